@@ -0,0 +1,16 @@
+# asset_revesting/_jit.py
+"""
+Optional numba JIT for the array kernels in core/ and data/.
+
+With numba installed, @njit compiles a kernel on first call (cached to
+disk); without it the decorator returns the function unchanged and the
+kernel runs as plain NumPy/Python.
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
@@ -15,7 +15,7 @@ from pydantic import BaseModel
 from typing import Optional
 import os
 
-from asset_revesting.data.database import init_db, get_connection
+from asset_revesting.data.database import init_db, get_connection, refreshing
 from asset_revesting.data.ingestion import fetch_all
 from asset_revesting.core.indicators import compute_all_indicators, get_latest_vix
 from asset_revesting.core.stage_analysis import get_all_stages, compute_stage_history
@@ -78,9 +78,10 @@ def refresh_data():
     """Fetch latest market data, recompute indicators and stages."""
     try:
         start = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
-        fetch_all(start_date=start)
-        compute_all_indicators()
-        compute_stage_history()
+        with refreshing():
+            fetch_all(start_date=start)
+            compute_all_indicators(incremental=True)
+            compute_stage_history()
         # Get updated data date
         with get_connection() as conn:
             row = conn.execute("SELECT MAX(date) as d FROM prices WHERE symbol='SPY'").fetchone()
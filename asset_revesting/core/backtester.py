@@ -13,7 +13,7 @@ Implements validation criteria from Signal Logic Spec v1.1 Section 9.
 
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import date as _date
 from asset_revesting.config import (
     ANALYSIS_SYMBOLS, CASH_SYMBOL,
     MAX_STOP_PCT, TRAILING_STOP_PCT,
@@ -22,7 +22,7 @@ from asset_revesting.config import (
 from asset_revesting.data.database import get_connection
 from asset_revesting.core.stage_analysis import (
     STAGE_1, STAGE_2, STAGE_3, STAGE_4, TRANSITIONAL,
-    compute_stage_history,
+    compute_stage_history, get_all_stages,
 )
 from asset_revesting.core.signals import (
     asset_rotation, check_exits, calc_trade_params, equity_pick,
@@ -30,7 +30,7 @@ from asset_revesting.core.signals import (
     LONG, LONG_INVERSE, HOLD, STRONG_ENTRY, MODERATE_ENTRY, NO_ENTRY,
     _get_close,
 )
-from asset_revesting.core.indicators import get_latest_vix
+from asset_revesting.core.indicators import get_latest_vix, get_latest_atr
 
 
 # =============================================================================
@@ -89,8 +89,8 @@ class BacktestResult:
 
         # Annual trade count
         if self.start_date and self.end_date:
-            years = max(0.5, (datetime.strptime(self.end_date, "%Y-%m-%d") -
-                              datetime.strptime(self.start_date, "%Y-%m-%d")).days / 365.25)
+            years = max(0.5, (_date.fromisoformat(self.end_date) -
+                              _date.fromisoformat(self.start_date)).days / 365.25)
             trades_per_year = len(completed) / years
         else:
             years = 1
@@ -139,14 +139,17 @@ def run_backtest(start_date, end_date, initial_capital=100000, db_path=None, ver
     result.initial_capital = initial_capital
 
     # Get all trading dates in range
+    # Streamed in batches straight into plain strings, no list of Row objects
+    trading_dates = []
     with get_connection(db_path) as conn:
-        dates = conn.execute("""
+        cursor = conn.execute("""
             SELECT DISTINCT date FROM prices
             WHERE symbol = 'SPY' AND date >= ? AND date <= ?
             ORDER BY date ASC
-        """, (start_date, end_date)).fetchall()
+        """, (start_date, end_date))
+        while batch := cursor.fetchmany(500):
+            trading_dates.extend(row[0] for row in batch)
 
-    trading_dates = [d["date"] for d in dates]
     if not trading_dates:
         print(f"No trading data between {start_date} and {end_date}")
         return result
@@ -180,6 +183,9 @@ def run_backtest(start_date, end_date, initial_capital=100000, db_path=None, ver
         if cooldown_days > 0:
             cooldown_days -= 1
 
+        # Today's stages, computed at most once and shared by exits and entries
+        day_stages = None
+
         # === STEP 1: Execute pending entry at today's close ===
         if pending_entry is not None:
             if vix_cooldown:
@@ -196,7 +202,7 @@ def run_backtest(start_date, end_date, initial_capital=100000, db_path=None, ver
                 if entry_price and entry_price > 0:
                     stage_for_params = pending_entry.get("stage", STAGE_2)
                     # Look up ATR for the underlying instrument on entry date
-                    atr_val = _get_atr(pending_entry.get("underlying", pending_entry["asset"]), date, db_path)
+                    atr_val = get_latest_atr(pending_entry.get("underlying", pending_entry["asset"]), date, db_path)
                     params = calc_trade_params(entry_price, pending_entry["direction"], stage_for_params, atr=atr_val)
 
                     shares = cash / entry_price
@@ -228,9 +234,11 @@ def run_backtest(start_date, end_date, initial_capital=100000, db_path=None, ver
         if position is not None and position["entry_date"] != date:
             current_close = _get_close(position["symbol"], date, db_path)
             if current_close is not None:
+                day_stages = get_all_stages(date, db_path)
                 exit_signal = check_exits(
                     position, current_close, date,
-                    position["underlying"], date, db_path
+                    position["underlying"], day_stages.get(position["underlying"]),
+                    date, db_path
                 )
 
                 if exit_signal:
@@ -290,13 +298,17 @@ def run_backtest(start_date, end_date, initial_capital=100000, db_path=None, ver
 
         # === STEP 3: If in cash, check for entries ===
         if position is None and pending_entry is None and not vix_cooldown and cooldown_days <= 0:
-            rotation = asset_rotation(date, db_path)
+            if day_stages is None:
+                day_stages = get_all_stages(date, db_path)
+            rotation = asset_rotation(date, db_path, day_stages)
 
             if rotation["direction"] != HOLD and rotation["signal_strength"] != NO_ENTRY:
                 underlying = rotation["asset"] if rotation["direction"] == LONG else "SPY"
 
-                from asset_revesting.core.stage_analysis import determine_stage
-                stage_info = determine_stage(underlying, date, db_path)
+                stage_info = day_stages.get(underlying)
+                if stage_info is None:
+                    from asset_revesting.core.stage_analysis import determine_stage
+                    stage_info = determine_stage(underlying, date, db_path)
 
                 pending_entry = {
                     "asset": rotation["asset"],
@@ -548,20 +560,6 @@ def run_full_backtest(start_date=None, end_date=None, initial_capital=100000,
 
 def _calc_holding_days(entry_date, exit_date):
     """Calculate calendar days between two date strings."""
-    d1 = datetime.strptime(entry_date, "%Y-%m-%d")
-    d2 = datetime.strptime(exit_date, "%Y-%m-%d")
+    d1 = _date.fromisoformat(entry_date) if isinstance(entry_date, str) else entry_date
+    d2 = _date.fromisoformat(exit_date) if isinstance(exit_date, str) else exit_date
     return (d2 - d1).days
-
-
-def _get_atr(symbol, date_str, db_path=None):
-    """
-    Look up the stored ATR-14 value for a symbol on or before a given date.
-    Returns None if not available (backtester falls back to fixed-pct stop).
-    """
-    with get_connection(db_path) as conn:
-        row = conn.execute("""
-            SELECT atr_14 FROM indicators
-            WHERE symbol = ? AND date <= ?
-            ORDER BY date DESC LIMIT 1
-        """, (symbol, date_str)).fetchone()
-    return row["atr_14"] if row and row["atr_14"] else None
@@ -266,7 +266,7 @@ def _enrich_position_with_atr(position, db_path=None):
     from asset_revesting.config import (
         USE_ATR_STOPS, ATR_MULTIPLIER, ATR_MIN_STOP_PCT, ATR_MAX_STOP_PCT
     )
-    from asset_revesting.core.backtester import _get_atr
+    from asset_revesting.core.indicators import get_latest_atr
 
     if not USE_ATR_STOPS:
         return position
@@ -279,7 +279,7 @@ def _enrich_position_with_atr(position, db_path=None):
     if not all([entry_price, entry_date, current_stop, underlying]):
         return position
 
-    atr = _get_atr(underlying, entry_date, db_path)
+    atr = get_latest_atr(underlying, entry_date, db_path)
     if not atr:
         return position
 
@@ -927,7 +927,7 @@ def run_daily_report(db_path=None):
     start = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
     try:
         fetch_all(start_date=start, db_path=db_path)
-        compute_all_indicators(db_path=db_path)
+        compute_all_indicators(db_path=db_path, incremental=True)
         compute_stage_history(db_path=db_path)
         print("  Data updated.")
     except Exception as e:
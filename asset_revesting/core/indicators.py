@@ -13,6 +13,14 @@ Computes all technical indicators defined in Signal Logic Spec v1.1 Section 2:
 All calculations use closing prices. Results are stored in SQLite.
 """
 
+import hashlib
+import os
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
 import pandas as pd
 import numpy as np
 from asset_revesting.config import (
@@ -25,7 +33,8 @@ from asset_revesting.config import (
     ANALYSIS_SYMBOLS,
     ATR_PERIOD
 )
-from asset_revesting.data.database import get_connection
+from asset_revesting.data.database import get_connection, run_cached
+from asset_revesting._jit import njit
 
 
 # Lazy import for ingestion functions (avoids pulling in yfinance at import time)
@@ -52,6 +61,58 @@ def calc_sma(series, period):
     return series.rolling(window=period, min_periods=period).mean()
 
 
+def calc_sma_multi(series, periods):
+    """
+    Simple Moving Averages for several periods from a single cumulative sum.
+    
+    Every period shares one prefix-sum pass over the series, so the cost is
+    O(n) total rather than one rolling reduction per period. Falls back to
+    calc_sma when the series contains gaps (NaN would poison the prefix sum).
+    
+    Args:
+        series: pd.Series of closing prices
+        periods: iterable of SMA periods
+    
+    Returns:
+        dict of {period: pd.Series} (NaN for insufficient data)
+    """
+    values = series.to_numpy(dtype="float64")
+    if np.isnan(values).any():
+        return {period: calc_sma(series, period) for period in periods}
+
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    result = {}
+    for period in periods:
+        sma = np.full(len(values), np.nan)
+        if len(values) >= period:
+            sma[period - 1:] = (csum[period:] - csum[:-period]) / period
+        result[period] = pd.Series(sma, index=series.index)
+    return result
+
+
+def calc_sma_tail(values, period, n_tail=1):
+    """
+    The last n_tail values of the SMA, from a cumulative sum over only the
+    n_tail + period - 1 rows they depend on instead of the whole series.
+    
+    Args:
+        values: pd.Series or array of closing prices
+        period: number of days
+        n_tail: number of trailing SMA values to return
+    
+    Returns:
+        np.ndarray of length n_tail (NaN for insufficient data; a NaN close
+        makes every later value in the tail NaN)
+    """
+    window = np.asarray(values, dtype="float64")[-(n_tail + period - 1):]
+    result = np.full(n_tail, np.nan)
+    if len(window) >= period:
+        csum = np.concatenate(([0.0], np.cumsum(window)))
+        sma = (csum[period:] - csum[:-period]) / period
+        result[n_tail - len(sma):] = sma
+    return result
+
+
 def calc_sma_slope(sma_series, lookback):
     """
     Percentage change in SMA over lookback days.
@@ -65,8 +126,19 @@ def calc_sma_slope(sma_series, lookback):
     Returns:
         pd.Series of slope percentages
     """
-    prior = sma_series.shift(lookback)
-    return ((sma_series - prior) / prior) * 100
+    slope = _sma_slope_kernel(sma_series.to_numpy(dtype="float64"), lookback)
+    return pd.Series(slope, index=sma_series.index)
+
+
+@njit(cache=True)
+def _sma_slope_kernel(sma, lookback):
+    """(sma[i] - sma[i - lookback]) / sma[i - lookback] * 100, NaN for the first lookback rows."""
+    n = sma.shape[0]
+    slope = np.full(n, np.nan)
+    if lookback < n:
+        prior = sma[:n - lookback]
+        slope[lookback:] = (sma[lookback:] - prior) / prior * 100
+    return slope
 
 
 def calc_bollinger_bands(close_series, period=BB_PERIOD, num_std=BB_STD_DEV):
@@ -81,26 +153,83 @@ def calc_bollinger_bands(close_series, period=BB_PERIOD, num_std=BB_STD_DEV):
     Returns:
         dict of pd.Series: {middle, upper, lower, bandwidth, percent_b}
     """
-    middle = calc_sma(close_series, period)
-    std = close_series.rolling(window=period, min_periods=period).std()
-    
-    upper = middle + (num_std * std)
-    lower = middle - (num_std * std)
-    bandwidth = ((upper - lower) / middle) * 100
+    # One rolling window feeds both moments; the band arithmetic then runs
+    # as a single array pass instead of a chain of aligned Series operations
+    rolling = close_series.rolling(window=period, min_periods=period)
+    middle = rolling.mean()
+    std = rolling.std()
     
-    # Avoid division by zero
-    band_range = upper - lower
-    percent_b = (close_series - lower) / band_range.replace(0, np.nan)
+    upper, lower, bandwidth, percent_b = _bollinger_kernel(
+        close_series.to_numpy(dtype="float64"), middle.to_numpy(), std.to_numpy(), num_std)
     
+    index = close_series.index
     return {
         "middle": middle,
-        "upper": upper,
-        "lower": lower,
-        "bandwidth": bandwidth,
-        "percent_b": percent_b,
+        "upper": pd.Series(upper, index=index),
+        "lower": pd.Series(lower, index=index),
+        "bandwidth": pd.Series(bandwidth, index=index),
+        "percent_b": pd.Series(percent_b, index=index),
     }
 
 
+@njit(cache=True)
+def _bollinger_kernel(close, middle, std, num_std):
+    """Upper, lower, bandwidth and %B from the rolling mean and std (NaN %B on a zero-width band)."""
+    width = num_std * std
+    upper = middle + width
+    lower = middle - width
+    band_range = upper - lower
+    bandwidth = (band_range / middle) * 100
+    # Avoid division by zero
+    percent_b = (close - lower) / np.where(band_range == 0, np.nan, band_range)
+    return upper, lower, bandwidth, percent_b
+
+
+def calc_bollinger_tail(close, n_tail=1, period=BB_PERIOD, num_std=BB_STD_DEV):
+    """
+    The last n_tail Bollinger Band values, from running sums of the close
+    and its square over only the rows they depend on.
+    
+    Sums are taken relative to the window's first close, so the variance
+    (sample, like calc_bollinger_bands) doesn't lose precision to the price
+    level.
+    
+    Args:
+        close: pd.Series or array of closing prices
+        n_tail: number of trailing values to return
+        period: SMA period (default 20)
+        num_std: number of standard deviations (default 2.0)
+    
+    Returns:
+        dict of np.ndarray (length n_tail): {middle, upper, lower, bandwidth, percent_b}
+    """
+    window = np.asarray(close, dtype="float64")[-(n_tail + period - 1):]
+    result = {key: np.full(n_tail, np.nan)
+              for key in ("middle", "upper", "lower", "bandwidth", "percent_b")}
+    if len(window) < period:
+        return result
+    
+    shifted = window - window[0]
+    csum = np.concatenate(([0.0], np.cumsum(shifted)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(shifted * shifted)))
+    total = csum[period:] - csum[:-period]
+    total_sq = csum_sq[period:] - csum_sq[:-period]
+    
+    middle = total / period + window[0]
+    std = np.sqrt(np.maximum(total_sq - total * total / period, 0.0) / (period - 1))
+    upper = middle + num_std * std
+    lower = middle - num_std * std
+    band_range = np.where(upper - lower == 0, np.nan, upper - lower)
+    
+    tail = slice(n_tail - len(middle), None)
+    result["middle"][tail] = middle
+    result["upper"][tail] = upper
+    result["lower"][tail] = lower
+    result["bandwidth"][tail] = (upper - lower) / middle * 100
+    result["percent_b"][tail] = (window[period - 1:] - lower) / band_range
+    return result
+
+
 def calc_relative_strength(close_series, sma_period=RELATIVE_STRENGTH_SMA):
     """
     Distance from SMA as percentage of SMA value.
@@ -115,7 +244,15 @@ def calc_relative_strength(close_series, sma_period=RELATIVE_STRENGTH_SMA):
         pd.Series of relative strength values
     """
     sma = calc_sma(close_series, sma_period)
-    return ((close_series - sma) / sma) * 100
+    rs = _relative_strength_kernel(close_series.to_numpy(dtype="float64"),
+                                   sma.to_numpy(dtype="float64"))
+    return pd.Series(rs, index=close_series.index)
+
+
+@njit(cache=True)
+def _relative_strength_kernel(close, sma):
+    """(close - sma) / sma * 100 element-wise."""
+    return (close - sma) / sma * 100
 
 
 def calc_atr(high_series, low_series, close_series, period=ATR_PERIOD):
@@ -167,6 +304,27 @@ def classify_vix(vix_value):
         return "EXTREME"
 
 
+# Regime bucket edges and labels for classify_vix_vec (same cut points as
+# classify_vix: a value equal to a threshold falls in the higher regime)
+_VIX_THRESHOLDS = np.array([VIX_LOW, VIX_NORMAL, VIX_ELEVATED, VIX_HIGH], dtype="float64")
+_VIX_LABELS = np.array(["LOW", "NORMAL", "ELEVATED", "HIGH", "EXTREME"], dtype=object)
+
+
+def classify_vix_vec(vix_values):
+    """
+    classify_vix() for a whole series in one searchsorted bucketize.
+    
+    Args:
+        vix_values: pd.Series or array of VIX values
+    
+    Returns:
+        np.ndarray (object) of regime labels, None where the value is missing
+    """
+    values = np.asarray(vix_values, dtype="float64")
+    labels = _VIX_LABELS[np.searchsorted(_VIX_THRESHOLDS, values, side="right")]
+    return np.where(np.isnan(values), None, labels)
+
+
 def calc_vix_indicators(vix_series):
     """
     Compute all VIX-derived indicators.
@@ -183,7 +341,7 @@ def calc_vix_indicators(vix_series):
     df["vix_close"] = vix_series
     
     # Regime classification
-    df["vix_regime"] = vix_series.apply(classify_vix)
+    df["vix_regime"] = classify_vix_vec(vix_series)
     
     # VIX SMAs for trend
     df["vix_sma_5"] = calc_sma(vix_series, VIX_TREND_FAST)
@@ -253,126 +411,294 @@ def compute_symbol_indicators(close_series, high_series=None, low_series=None):
     Returns:
         pd.DataFrame with all indicator columns
     """
-    df = pd.DataFrame(index=close_series.index)
-    df["close"] = close_series
+    # Every column is written into one pre-allocated float64 block, which
+    # becomes the DataFrame's single block without a consolidation copy
+    index = close_series.index
+    close = close_series.to_numpy(dtype="float64")
+    block = np.empty((len(_FRAME_COLUMNS), len(close)))
+    cols = dict(zip(_FRAME_COLUMNS, block))
+    cols["close"][:] = close
 
-    # SMAs
-    for period in SMA_PERIODS:
-        df[f"sma_{period}"] = calc_sma(close_series, period)
+    # SMAs (one cumulative-sum pass shared by all periods)
+    smas = calc_sma_multi(close_series, SMA_PERIODS)
+    for period, sma in smas.items():
+        cols[f"sma_{period}"][:] = sma.to_numpy()
 
     # SMA Slopes (for stage analysis)
-    df["sma_150_slope"] = calc_sma_slope(df["sma_150"], SLOPE_LOOKBACK)
-    df["sma_200_slope"] = calc_sma_slope(df["sma_200"], SLOPE_LOOKBACK)
-    df["sma_50_slope"] = calc_sma_slope(df["sma_50"], SLOPE_LOOKBACK)
+    for period in (150, 200, 50):
+        cols[f"sma_{period}_slope"][:] = _sma_slope_kernel(cols[f"sma_{period}"], SLOPE_LOOKBACK)
 
     # Bollinger Bands
     bb = calc_bollinger_bands(close_series)
-    df["bb_upper"] = bb["upper"]
-    df["bb_middle"] = bb["middle"]
-    df["bb_lower"] = bb["lower"]
-    df["bb_bandwidth"] = bb["bandwidth"]
-    df["bb_percent_b"] = bb["percent_b"]
+    for key in ("upper", "middle", "lower", "bandwidth", "percent_b"):
+        cols[f"bb_{key}"][:] = bb[key].to_numpy()
 
     # Relative Strength
-    df["relative_strength"] = calc_relative_strength(close_series)
+    cols["relative_strength"][:] = calc_relative_strength(close_series).to_numpy()
 
     # ATR (requires high/low; gracefully skipped if not provided)
     if high_series is not None and low_series is not None:
-        df["atr_14"] = calc_atr(high_series, low_series, close_series)
+        cols["atr_14"][:] = calc_atr(high_series, low_series, close_series).reindex(index).to_numpy()
     else:
-        df["atr_14"] = np.nan
+        cols["atr_14"][:] = np.nan
 
-    return df
+    return pd.DataFrame(block.T, index=index, columns=_FRAME_COLUMNS, copy=False)
 
 
 # =============================================================================
 # DATABASE STORAGE
 # =============================================================================
 
+# Insert statements (VIX and volume rows go through executemany)
+_SQL_INSERT_INDICATORS_HEAD = """
+    INSERT OR REPLACE INTO indicators
+    (symbol, date, sma_5, sma_20, sma_50, sma_150, sma_200,
+     sma_150_slope, sma_200_slope, sma_50_slope,
+     bb_upper, bb_middle, bb_lower, bb_bandwidth, bb_percent_b,
+     relative_strength, atr_14)
+    VALUES
+"""
+
+# Column order matches the placeholders after (symbol, date) above
+_INDICATOR_COLUMNS = [
+    "sma_5", "sma_20", "sma_50", "sma_150", "sma_200",
+    "sma_150_slope", "sma_200_slope", "sma_50_slope",
+    "bb_upper", "bb_middle", "bb_lower", "bb_bandwidth", "bb_percent_b",
+    "relative_strength", "atr_14",
+]
+_INDICATOR_ROW_WIDTH = 2 + len(_INDICATOR_COLUMNS)
+# compute_symbol_indicators() frame layout
+_FRAME_COLUMNS = ["close", *_INDICATOR_COLUMNS]
+
+# Symbol indicators go in as multi-row INSERTs (up to this many rows per
+# statement, within SQLite's bound-parameter limit): one statement step per
+# chunk instead of one per row
+_INDICATOR_ROWS_PER_INSERT = 500
+
+_SQL_INSERT_VIX = """
+    INSERT OR REPLACE INTO vix_indicators
+    (date, vix_close, vix_regime, vix_sma_5, vix_sma_20,
+     vix_trend, vix_daily_change, vix_spike)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_INSERT_VOLUME = """
+    INSERT OR REPLACE INTO volume_indicators
+    (date, panic_ratio, fomo_ratio, panic_ratio_ma, fomo_ratio_ma)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
 def store_symbol_indicators(symbol, indicators_df, db_path=None):
     """
     Store computed indicators for a symbol in SQLite.
     
+    Rows are assembled as one object block: the indicator columns are
+    extracted together as a float64 array with NaN mapped to None, laid
+    out beside symbol and date, and flattened row-major into one parameter
+    list for multi-row INSERTs.
+    
     Args:
         symbol: ticker symbol
         indicators_df: DataFrame from compute_symbol_indicators()
         db_path: override database path
     """
+    values = indicators_df.reindex(columns=_INDICATOR_COLUMNS).to_numpy(dtype="float64")
+    rows = np.empty((len(values), _INDICATOR_ROW_WIDTH), dtype=object)
+    rows[:, 0] = symbol
+    rows[:, 1] = indicators_df.index.strftime("%Y-%m-%d")
+    rows[:, 2:] = np.where(np.isnan(values), None, values)
+    # Row-major flat parameter list: symbol, date, 15 values, symbol, ...
+    params = rows.ravel().tolist()
     with get_connection(db_path) as conn:
-        for date_idx, row in indicators_df.iterrows():
-            date_str = date_idx.strftime("%Y-%m-%d")
-            conn.execute("""
-                INSERT OR REPLACE INTO indicators
-                (symbol, date, sma_5, sma_20, sma_50, sma_150, sma_200,
-                 sma_150_slope, sma_200_slope, sma_50_slope,
-                 bb_upper, bb_middle, bb_lower, bb_bandwidth, bb_percent_b,
-                 relative_strength, atr_14)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                symbol, date_str,
-                _safe_float(row.get("sma_5")),
-                _safe_float(row.get("sma_20")),
-                _safe_float(row.get("sma_50")),
-                _safe_float(row.get("sma_150")),
-                _safe_float(row.get("sma_200")),
-                _safe_float(row.get("sma_150_slope")),
-                _safe_float(row.get("sma_200_slope")),
-                _safe_float(row.get("sma_50_slope")),
-                _safe_float(row.get("bb_upper")),
-                _safe_float(row.get("bb_middle")),
-                _safe_float(row.get("bb_lower")),
-                _safe_float(row.get("bb_bandwidth")),
-                _safe_float(row.get("bb_percent_b")),
-                _safe_float(row.get("relative_strength")),
-                _safe_float(row.get("atr_14")),
-            ))
+        rows_per_insert = min(_INDICATOR_ROWS_PER_INSERT,
+                              _variable_limit(conn) // _INDICATOR_ROW_WIDTH)
+        step = rows_per_insert * _INDICATOR_ROW_WIDTH
+        for start in range(0, len(params), step):
+            chunk = params[start:start + step]
+            conn.execute(_indicator_insert_sql(len(chunk) // _INDICATOR_ROW_WIDTH), chunk)
+
+
+def _variable_limit(conn):
+    """Max bound parameters per statement (999 on SQLite builds before 3.32)."""
+    if hasattr(conn, "getlimit"):  # Python 3.11+
+        return conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    return 999
+
+
+@lru_cache(maxsize=8)
+def _indicator_insert_sql(n_rows):
+    """INSERT OR REPLACE of n_rows indicator rows in one statement."""
+    row = "(" + ", ".join(["?"] * _INDICATOR_ROW_WIDTH) + ")"
+    return _SQL_INSERT_INDICATORS_HEAD + ", ".join([row] * n_rows)
 
 
 def store_vix_indicators(vix_df, db_path=None):
     """Store VIX indicators in SQLite."""
+    rows = list(zip(
+        vix_df.index.strftime("%Y-%m-%d"),
+        _column_or_none(vix_df, "vix_close"),
+        _text_column_or_none(vix_df, "vix_regime"),
+        _column_or_none(vix_df, "vix_sma_5"),
+        _column_or_none(vix_df, "vix_sma_20"),
+        _text_column_or_none(vix_df, "vix_trend"),
+        _column_or_none(vix_df, "vix_daily_change"),
+        _int_column_or_none(vix_df, "vix_spike"),
+    ))
     with get_connection(db_path) as conn:
-        for date_idx, row in vix_df.iterrows():
-            date_str = date_idx.strftime("%Y-%m-%d")
-            conn.execute("""
-                INSERT OR REPLACE INTO vix_indicators
-                (date, vix_close, vix_regime, vix_sma_5, vix_sma_20,
-                 vix_trend, vix_daily_change, vix_spike)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                date_str,
-                _safe_float(row.get("vix_close")),
-                row.get("vix_regime"),
-                _safe_float(row.get("vix_sma_5")),
-                _safe_float(row.get("vix_sma_20")),
-                row.get("vix_trend"),
-                _safe_float(row.get("vix_daily_change")),
-                int(row.get("vix_spike", 0)) if pd.notna(row.get("vix_spike")) else None,
-            ))
+        conn.executemany(_SQL_INSERT_VIX, rows)
 
 
 def store_volume_indicators(volume_df, db_path=None):
     """Store volume ratio indicators in SQLite."""
+    rows = list(zip(
+        volume_df.index.strftime("%Y-%m-%d"),
+        _column_or_none(volume_df, "panic_ratio"),
+        _column_or_none(volume_df, "fomo_ratio"),
+        _column_or_none(volume_df, "panic_ratio_ma"),
+        _column_or_none(volume_df, "fomo_ratio_ma"),
+    ))
     with get_connection(db_path) as conn:
-        for date_idx, row in volume_df.iterrows():
-            date_str = date_idx.strftime("%Y-%m-%d")
-            conn.execute("""
-                INSERT OR REPLACE INTO volume_indicators
-                (date, panic_ratio, fomo_ratio, panic_ratio_ma, fomo_ratio_ma)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                date_str,
-                _safe_float(row.get("panic_ratio")),
-                _safe_float(row.get("fomo_ratio")),
-                _safe_float(row.get("panic_ratio_ma")),
-                _safe_float(row.get("fomo_ratio_ma")),
-            ))
+        conn.executemany(_SQL_INSERT_VOLUME, rows)
 
 
 # =============================================================================
 # MAIN COMPUTATION PIPELINE
 # =============================================================================
 
-def compute_all_indicators(start_date=None, end_date=None, db_path=None):
+# Incremental updates: the last stored indicator date, and the source row
+# `tail_days` rows before it (where the warmup window starts)
+_SQL_LAST_INDICATOR_DATE = "SELECT MAX(date) FROM indicators WHERE symbol = ?"
+_SQL_PRICE_DATE_BACK = """
+    SELECT date FROM prices WHERE symbol = ? AND date <= ?
+    ORDER BY date DESC LIMIT 1 OFFSET ?
+"""
+_SQL_LAST_VIX_INDICATOR_DATE = "SELECT MAX(date) FROM vix_indicators"
+_SQL_VIX_DATE_BACK = """
+    SELECT date FROM vix WHERE date <= ?
+    ORDER BY date DESC LIMIT 1 OFFSET ?
+"""
+_SQL_LAST_VOLUME_INDICATOR_DATE = "SELECT MAX(date) FROM volume_indicators"
+_SQL_NYSE_VOLUME_DATE_BACK = """
+    SELECT date FROM nyse_volume WHERE date <= ?
+    ORDER BY date DESC LIMIT 1 OFFSET ?
+"""
+
+
+def _incremental_window(last_sql, back_sql, params, tail_days, start_date, db_path=None):
+    """
+    Where an incremental recompute loads from and which rows it rewrites.
+    
+    Returns:
+        tuple: (load_start, write_from) — write_from is None when nothing is
+               stored yet (full recompute); load_start falls back to
+               start_date when there is less history than tail_days
+    """
+    with get_connection(db_path) as conn:
+        last = conn.execute(last_sql, params).fetchone()[0]
+        if last is None:
+            return start_date, None
+        row = conn.execute(back_sql, [*params, last, tail_days]).fetchone()
+    return (row[0] if row else start_date), last
+
+
+def _rows_from(df, write_from):
+    """Rows dated on or after write_from (all rows when it is None)."""
+    if write_from is None:
+        return df
+    return df[df.index >= pd.Timestamp(write_from)]
+
+
+def _price_indicators(price_df):
+    """compute_symbol_indicators() on a get_price_dataframe() frame."""
+    return compute_symbol_indicators(
+        price_df["close"],
+        high_series=price_df.get("high"),
+        low_series=price_df.get("low"),
+    )
+
+
+# Indicator frames from earlier compute_all_indicators() calls in this
+# process, keyed on a hash of the price data they were computed from — a
+# repeated refresh over unchanged prices skips the computation
+_INDICATOR_CACHE = OrderedDict()
+_INDICATOR_CACHE_SIZE = 32
+
+
+def _price_digest(price_df):
+    """Content hash of a price frame's dates and close/high/low columns."""
+    digest = hashlib.sha1(price_df.index.asi8.tobytes())
+    for col in ("close", "high", "low"):
+        if col in price_df.columns:
+            digest.update(col.encode())
+            digest.update(price_df[col].to_numpy(dtype="float64").tobytes())
+    return digest.hexdigest()
+
+
+def _compute_price_indicators(frames, workers=1):
+    """
+    Run _price_indicators over {symbol: price_df}, reusing cached results
+    for price data already computed in this process.
+    
+    Returns:
+        dict: {symbol: indicators DataFrame, or the exception it raised}
+    """
+    digests = {symbol: _price_digest(df) for symbol, df in frames.items()}
+    computed = {}
+    for symbol, key in digests.items():
+        if key in _INDICATOR_CACHE:
+            _INDICATOR_CACHE.move_to_end(key)
+            computed[symbol] = _INDICATOR_CACHE[key]
+    
+    pending = {symbol: df for symbol, df in frames.items() if symbol not in computed}
+    for symbol, result in _run_price_indicators(pending, workers).items():
+        computed[symbol] = result
+        if not isinstance(result, Exception):
+            _INDICATOR_CACHE[digests[symbol]] = result
+            if len(_INDICATOR_CACHE) > _INDICATOR_CACHE_SIZE:
+                _INDICATOR_CACHE.popitem(last=False)
+    return computed
+
+
+def _run_price_indicators(frames, workers=1):
+    """
+    Run _price_indicators over {symbol: price_df}, across worker processes
+    only when more than one worker is asked for.
+    
+    Serial is the default: a symbol takes milliseconds, which process
+    start-up (a pandas re-import per worker under spawn) outweighs.
+    
+    Returns:
+        dict: {symbol: indicators DataFrame, or the exception it raised}
+    """
+    workers = min(len(frames), workers or 1)
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {symbol: pool.submit(_price_indicators, df)
+                           for symbol, df in frames.items()}
+                computed = {symbol: future.exception() or future.result()
+                            for symbol, future in futures.items()}
+            broken = [e for e in computed.values() if isinstance(e, BrokenProcessPool)]
+            if broken:
+                raise broken[0]
+            return computed
+        except (OSError, NotImplementedError, BrokenProcessPool) as e:
+            # No usable process support here (e.g. missing semaphores, a
+            # worker killed) — run inline
+            print(f"  Worker processes unavailable ({e}), computing serially")
+    
+    computed = {}
+    for symbol, df in frames.items():
+        try:
+            computed[symbol] = _price_indicators(df)
+        except Exception as e:
+            computed[symbol] = e
+    return computed
+
+
+def compute_all_indicators(start_date=None, end_date=None, db_path=None,
+                           incremental=False, tail_days=250, workers=1):
     """
     Compute all indicators for all analysis symbols and store in SQLite.
     This is the main entry point for Layer 2.
@@ -381,6 +707,14 @@ def compute_all_indicators(start_date=None, end_date=None, db_path=None):
         start_date: Optional start date filter
         end_date: Optional end date filter
         db_path: Override database path
+        incremental: Only recompute from the last stored indicator date on,
+                     loading tail_days earlier rows as warmup (daily update).
+                     The full path is used for tables with nothing stored.
+        tail_days: Warmup rows for incremental mode — covers the 200-day SMA
+                   plus its slope lookback; ATR's Wilder smoothing converges
+                   well within it
+        workers: Processes for the per-symbol computation (default 1,
+                 computed inline; capped at the symbol count)
     
     Returns:
         dict: Summary of computations performed
@@ -395,64 +729,95 @@ def compute_all_indicators(start_date=None, end_date=None, db_path=None):
     from asset_revesting.config import WARNING_SYMBOLS
     all_symbols = ANALYSIS_SYMBOLS + WARNING_SYMBOLS
     
+    # Reads and writes stay on this thread's connection; only the pure
+    # per-symbol computation is farmed out
+    frames, write_from, failed = {}, {}, {}
     for symbol in all_symbols:
         try:
-            price_df = ingestion.get_price_dataframe(symbol, start_date, end_date, db_path)
-            
-            if price_df.empty:
-                print(f"  {symbol}: No price data available")
+            load_start, write_from[symbol] = start_date, None
+            if incremental:
+                load_start, write_from[symbol] = _incremental_window(
+                    _SQL_LAST_INDICATOR_DATE, _SQL_PRICE_DATE_BACK, [symbol],
+                    tail_days, start_date, db_path)
+            price_df = ingestion.get_cached_price_dataframe(symbol, load_start, end_date, db_path)
+            if not price_df.empty:
+                frames[symbol] = price_df
+        except Exception as e:
+            failed[symbol] = e
+    
+    computed = _compute_price_indicators(frames, workers)
+    
+    # Every table is written inside one bulk transaction: a single commit
+    # (synchronous=OFF — indicators can always be recomputed); each store
+    # still runs in its own savepoint, so one failure does not undo the rest
+    with get_connection(db_path, bulk=True):
+        for symbol in all_symbols:
+            try:
+                if symbol in failed:
+                    raise failed[symbol]
+                if symbol not in computed:
+                    print(f"  {symbol}: No price data available")
+                    results[symbol] = 0
+                    continue
+                if isinstance(computed[symbol], Exception):
+                    raise computed[symbol]
+                
+                indicators = _rows_from(computed[symbol], write_from[symbol])
+                store_symbol_indicators(symbol, indicators, db_path)
+                
+                # Count non-NaN rows (valid indicator values)
+                valid_rows = indicators["sma_200"].notna().sum()
+                results[symbol] = int(valid_rows)
+                print(f"  {symbol}: {valid_rows} rows with full indicators (of {len(indicators)} total)")
+                
+            except Exception as e:
+                print(f"  ERROR computing {symbol}: {e}")
                 results[symbol] = 0
-                continue
-            
-            indicators = compute_symbol_indicators(
-                price_df["close"],
-                high_series=price_df.get("high"),
-                low_series=price_df.get("low"),
-            )
-            store_symbol_indicators(symbol, indicators, db_path)
-            
-            # Count non-NaN rows (valid indicator values)
-            valid_rows = indicators["sma_200"].notna().sum()
-            results[symbol] = int(valid_rows)
-            print(f"  {symbol}: {valid_rows} rows with full indicators (of {len(indicators)} total)")
-            
+        
+        # --- VIX indicators ---
+        print("\nComputing VIX indicators...")
+        try:
+            load_start, write_from = start_date, None
+            if incremental:
+                load_start, write_from = _incremental_window(
+                    _SQL_LAST_VIX_INDICATOR_DATE, _SQL_VIX_DATE_BACK, [],
+                    tail_days, start_date, db_path)
+            vix_df = ingestion.get_vix_dataframe(load_start, end_date, db_path)
+            if not vix_df.empty:
+                vix_indicators = _rows_from(calc_vix_indicators(vix_df["close"]), write_from)
+                store_vix_indicators(vix_indicators, db_path)
+                valid = vix_indicators["vix_sma_20"].notna().sum()
+                results["VIX"] = int(valid)
+                print(f"  VIX: {valid} rows with full indicators")
+            else:
+                print("  VIX: No data available")
+                results["VIX"] = 0
         except Exception as e:
-            print(f"  ERROR computing {symbol}: {e}")
-            results[symbol] = 0
-    
-    # --- VIX indicators ---
-    print("\nComputing VIX indicators...")
-    try:
-        vix_df = ingestion.get_vix_dataframe(start_date, end_date, db_path)
-        if not vix_df.empty:
-            vix_indicators = calc_vix_indicators(vix_df["close"])
-            store_vix_indicators(vix_indicators, db_path)
-            valid = vix_indicators["vix_sma_20"].notna().sum()
-            results["VIX"] = int(valid)
-            print(f"  VIX: {valid} rows with full indicators")
-        else:
-            print("  VIX: No data available")
+            print(f"  ERROR computing VIX indicators: {e}")
             results["VIX"] = 0
-    except Exception as e:
-        print(f"  ERROR computing VIX indicators: {e}")
-        results["VIX"] = 0
-    
-    # --- Volume ratios ---
-    print("\nComputing volume ratios...")
-    try:
-        vol_df = ingestion.get_nyse_volume_dataframe(start_date, end_date, db_path)
-        if not vol_df.empty:
-            volume_indicators = calc_volume_ratios(vol_df["up_volume"], vol_df["down_volume"])
-            store_volume_indicators(volume_indicators, db_path)
-            valid = volume_indicators["panic_ratio_ma"].notna().sum()
-            results["volume_ratios"] = int(valid)
-            print(f"  Volume ratios: {valid} rows with full indicators")
-        else:
-            print("  Volume ratios: No NYSE volume data (run daily update after market close)")
+        
+        # --- Volume ratios ---
+        print("\nComputing volume ratios...")
+        try:
+            load_start, write_from = start_date, None
+            if incremental:
+                load_start, write_from = _incremental_window(
+                    _SQL_LAST_VOLUME_INDICATOR_DATE, _SQL_NYSE_VOLUME_DATE_BACK, [],
+                    tail_days, start_date, db_path)
+            vol_df = ingestion.get_nyse_volume_dataframe(load_start, end_date, db_path)
+            if not vol_df.empty:
+                volume_indicators = _rows_from(
+                    calc_volume_ratios(vol_df["up_volume"], vol_df["down_volume"]), write_from)
+                store_volume_indicators(volume_indicators, db_path)
+                valid = volume_indicators["panic_ratio_ma"].notna().sum()
+                results["volume_ratios"] = int(valid)
+                print(f"  Volume ratios: {valid} rows with full indicators")
+            else:
+                print("  Volume ratios: No NYSE volume data (run daily update after market close)")
+                results["volume_ratios"] = 0
+        except Exception as e:
+            print(f"  ERROR computing volume ratios: {e}")
             results["volume_ratios"] = 0
-    except Exception as e:
-        print(f"  ERROR computing volume ratios: {e}")
-        results["volume_ratios"] = 0
     
     return results
 
@@ -461,6 +826,31 @@ def compute_all_indicators(start_date=None, end_date=None, db_path=None):
 # RETRIEVAL FUNCTIONS (for use by Layer 3 — Signal Generator)
 # =============================================================================
 
+# LIMIT is bound, so the latest-row and latest-two-rows lookups share one
+# prepared statement in the connection's statement cache
+_SQL_LATEST_INDICATORS = """
+    SELECT * FROM indicators
+    WHERE symbol = ?
+    ORDER BY date DESC LIMIT ?
+"""
+
+_SQL_LATEST_INDICATORS_AS_OF = """
+    SELECT * FROM indicators
+    WHERE symbol = ? AND date <= ?
+    ORDER BY date DESC LIMIT ?
+"""
+
+
+def _fetch_latest_indicator_rows(symbol, as_of_date, limit, db_path=None):
+    """Newest-first indicator rows for a symbol, up to limit."""
+    with get_connection(db_path) as conn:
+        if as_of_date:
+            return conn.execute(_SQL_LATEST_INDICATORS_AS_OF,
+                                (symbol, as_of_date, limit)).fetchall()
+        return conn.execute(_SQL_LATEST_INDICATORS, (symbol, limit)).fetchall()
+
+
+@run_cached
 def get_latest_indicators(symbol, as_of_date=None, db_path=None):
     """
     Get the most recent indicator values for a symbol.
@@ -469,25 +859,63 @@ def get_latest_indicators(symbol, as_of_date=None, db_path=None):
     Returns:
         dict or None: All indicator values for the date
     """
+    rows = _fetch_latest_indicator_rows(symbol, as_of_date, 1, db_path)
+    if rows:
+        return dict(rows[0])
+    return None
+
+
+@run_cached
+def get_latest_indicators_with_prev(symbol, as_of_date=None, db_path=None):
+    """
+    Get the latest indicator row and the one before it in a single query.
+    If as_of_date is provided, get rows as of that date (for backtesting).
+    
+    Returns:
+        tuple: (today, prev) dicts — either may be None if data is missing
+    """
+    rows = _fetch_latest_indicator_rows(symbol, as_of_date, 2, db_path)
+    today = dict(rows[0]) if len(rows) > 0 else None
+    prev = dict(rows[1]) if len(rows) > 1 else None
+    return today, prev
+
+
+def get_latest_indicators_multi(symbols, as_of_date=None, db_path=None):
+    """
+    Get the most recent indicator values for several symbols in one query.
+    If as_of_date is provided, get indicators as of that date (for backtesting).
+    
+    Returns:
+        dict: {symbol: dict or None} for every requested symbol
+    """
+    symbols = list(symbols)
+    result = {symbol: None for symbol in symbols}
+    if not symbols:
+        return result
+
+    placeholders = ", ".join("?" for _ in symbols)
+    params = list(symbols)
+    date_filter = ""
+    if as_of_date:
+        date_filter = "AND date <= ?"
+        params.append(as_of_date)
+
     with get_connection(db_path) as conn:
-        if as_of_date:
-            row = conn.execute("""
-                SELECT * FROM indicators
-                WHERE symbol = ? AND date <= ?
-                ORDER BY date DESC LIMIT 1
-            """, (symbol, as_of_date)).fetchone()
-        else:
-            row = conn.execute("""
-                SELECT * FROM indicators
-                WHERE symbol = ?
-                ORDER BY date DESC LIMIT 1
-            """, (symbol,)).fetchone()
-        
-        if row:
-            return dict(row)
-        return None
+        rows = conn.execute(f"""
+            SELECT i.* FROM indicators i
+            JOIN (
+                SELECT symbol, MAX(date) AS date FROM indicators
+                WHERE symbol IN ({placeholders}) {date_filter}
+                GROUP BY symbol
+            ) latest ON i.symbol = latest.symbol AND i.date = latest.date
+        """, params).fetchall()
+
+    for row in rows:
+        result[row["symbol"]] = dict(row)
+    return result
 
 
+@run_cached
 def get_latest_vix(as_of_date=None, db_path=None):
     """Get the most recent VIX indicators."""
     with get_connection(db_path) as conn:
@@ -508,6 +936,7 @@ def get_latest_vix(as_of_date=None, db_path=None):
         return None
 
 
+@run_cached
 def get_latest_volume(as_of_date=None, db_path=None):
     """Get the most recent volume ratio indicators."""
     with get_connection(db_path) as conn:
@@ -528,10 +957,85 @@ def get_latest_volume(as_of_date=None, db_path=None):
         return None
 
 
+@run_cached
+def get_latest_atr(symbol, as_of_date, db_path=None):
+    """
+    Look up the stored ATR-14 value for a symbol on or before a given date.
+    Returns None if not available (callers fall back to a fixed-pct stop).
+    """
+    with get_connection(db_path) as conn:
+        row = conn.execute("""
+            SELECT atr_14 FROM indicators
+            WHERE symbol = ? AND date <= ?
+            ORDER BY date DESC LIMIT 1
+        """, (symbol, as_of_date)).fetchone()
+    return row["atr_14"] if row and row["atr_14"] else None
+
+
+_SNAPSHOT_VIX_COLUMNS = (
+    "date", "vix_close", "vix_regime", "vix_sma_5", "vix_sma_20",
+    "vix_trend", "vix_daily_change", "vix_spike",
+)
+_SNAPSHOT_VOLUME_COLUMNS = (
+    "date", "panic_ratio", "fomo_ratio", "panic_ratio_ma", "fomo_ratio_ma",
+)
+
+
+@run_cached
+def get_snapshot(symbol, as_of_date=None, db_path=None):
+    """
+    Everything the entry pillars read for one symbol, in a single query:
+    its latest indicator row and close, plus the latest VIX and volume rows.
+    Each part is "latest as of as_of_date", same as the separate getters.
+    
+    Returns:
+        dict: {indicators, close, vix, volume} — any part may be None
+    """
+    date_filter = "AND date <= :as_of" if as_of_date else ""
+    vix_cols = ", ".join(f'v.{c} AS "vix.{c}"' for c in _SNAPSHOT_VIX_COLUMNS)
+    vol_cols = ", ".join(f'vol.{c} AS "volume.{c}"' for c in _SNAPSHOT_VOLUME_COLUMNS)
+
+    with get_connection(db_path) as conn:
+        cursor = conn.execute(f"""
+            SELECT i.*, p.close AS "prices.close", {vix_cols}, {vol_cols}
+            FROM (SELECT 1) base
+            LEFT JOIN (
+                SELECT * FROM indicators
+                WHERE symbol = :symbol {date_filter}
+                ORDER BY date DESC LIMIT 1
+            ) i ON 1
+            LEFT JOIN prices p ON p.symbol = i.symbol AND p.date = i.date
+            LEFT JOIN vix_indicators v ON v.date = (
+                SELECT MAX(date) FROM vix_indicators WHERE 1 {date_filter})
+            LEFT JOIN volume_indicators vol ON vol.date = (
+                SELECT MAX(date) FROM volume_indicators WHERE 1 {date_filter})
+        """, {"symbol": symbol, "as_of": as_of_date})
+        row = cursor.fetchone()
+        names = [d[0] for d in cursor.description]
+
+    parts = {"indicators": {}, "prices": {}, "vix": {}, "volume": {}}
+    for name, value in zip(names, row):
+        prefix, _, col = name.rpartition(".")
+        parts[prefix or "indicators"][col] = value
+
+    def _present(part):
+        return part if part.get("date") is not None else None
+
+    return {
+        "indicators": _present(parts["indicators"]),
+        "close": parts["prices"]["close"],
+        "vix": _present(parts["vix"]),
+        "volume": _present(parts["volume"]),
+    }
+
+
 def get_indicator_history(symbol, start_date=None, end_date=None, db_path=None):
     """
     Get indicator history for a symbol as a DataFrame.
     Useful for backtesting and charting.
+    
+    Rows are fetched directly and transposed into one typed array per
+    column, skipping pandas' generic read_sql/parse_dates path.
     """
     with get_connection(db_path) as conn:
         query = "SELECT * FROM indicators WHERE symbol = ?"
@@ -546,20 +1050,44 @@ def get_indicator_history(symbol, start_date=None, end_date=None, db_path=None):
         
         query += " ORDER BY date ASC"
         
-        df = pd.read_sql_query(query, conn, params=params, parse_dates=["date"])
-        df.set_index("date", inplace=True)
-        return df
+        cursor = conn.execute(query, params)
+        rows = cursor.fetchall()
+        colnames = [d[0] for d in cursor.description]
+
+    cols = list(zip(*rows)) if rows else [()] * len(colnames)
+    df = pd.DataFrame({
+        name: np.asarray(col, dtype=object if name in ("symbol", "date") else "float64")
+        for name, col in zip(colnames, cols)
+    })
+    df.index = pd.to_datetime(df.pop("date"))
+    return df
 
 
 # =============================================================================
 # HELPERS
 # =============================================================================
 
-def _safe_float(val):
-    """Convert to float, returning None for NaN/None."""
-    if val is None or (isinstance(val, float) and np.isnan(val)):
-        return None
-    try:
-        return float(val)
-    except (ValueError, TypeError):
-        return None
+def _column_or_none(df, col):
+    """Extract a float column as an object array with NaN replaced by None."""
+    if col not in df.columns:
+        return [None] * len(df)
+    values = df[col].to_numpy(dtype="float64")
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def _text_column_or_none(df, col):
+    """Extract a label column as a list with missing values as None."""
+    if col not in df.columns:
+        return [None] * len(df)
+    values = df[col]
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _int_column_or_none(df, col):
+    """Extract a flag column as a list of ints with missing values as None."""
+    if col not in df.columns:
+        return [None] * len(df)
+    values = df[col].to_numpy(dtype="float64")
+    missing = np.isnan(values)
+    ints = np.where(missing, 0, values).astype(np.int64)
+    return np.where(missing, None, ints).tolist()
@@ -13,10 +13,10 @@ from datetime import datetime, date
 from asset_revesting.config import (
     CASH_SYMBOL, VIX_EMERGENCY_LEVEL,
 )
-from asset_revesting.data.database import get_connection, init_db
+from asset_revesting.data.database import get_connection, init_db, cached_reads
 from asset_revesting.core.indicators import (
-    get_latest_indicators, get_latest_vix, get_latest_volume,
-    compute_all_indicators,
+    get_latest_indicators, get_latest_indicators_multi,
+    get_latest_vix, get_latest_volume, get_latest_atr, compute_all_indicators,
 )
 from asset_revesting.core.stage_analysis import (
     STAGE_1, STAGE_2, STAGE_3, STAGE_4, TRANSITIONAL,
@@ -159,6 +159,12 @@ def get_dashboard_data(db_path=None):
     Get all data needed for the dashboard in a single call.
     Returns a dict with everything the frontend needs.
     """
+    # Stages, rotation and warnings re-read the same rows — memoize per render
+    with cached_reads():
+        return _build_dashboard_data(db_path)
+
+
+def _build_dashboard_data(db_path=None):
     today = date.today().isoformat()
 
     # Find the latest date we actually have data for
@@ -191,10 +197,16 @@ def get_dashboard_data(db_path=None):
         current_price = None
         unrealized_pnl = None
 
-    # Stages
+    # Latest indicator rows, fetched once for both stages and indicator display
+    dashboard_symbols = ["SPY", "QQQ", "TLT", "UUP", "UDN"]
+    ind_map = get_latest_indicators_multi(dashboard_symbols, db_path=db_path)
+
+    # Stages — full results are reused by the rotation and warning checks
+    stage_infos = {}
     stages = {}
-    for symbol in ["SPY", "QQQ", "TLT", "UUP", "UDN"]:
-        stage_info = determine_stage(symbol, db_path=db_path)
+    for symbol in dashboard_symbols:
+        stage_info = determine_stage(symbol, db_path=db_path, indicators=ind_map[symbol])
+        stage_infos[symbol] = stage_info
         stages[symbol] = {
             "stage": stage_info["stage"],
             "raw_stage": stage_info["raw_stage"],
@@ -213,8 +225,8 @@ def get_dashboard_data(db_path=None):
 
     # Latest indicators for all symbols
     indicators = {}
-    for symbol in ["SPY", "QQQ", "TLT", "UUP", "UDN"]:
-        ind = get_latest_indicators(symbol, db_path=db_path)
+    for symbol in dashboard_symbols:
+        ind = ind_map[symbol]
         if ind:
             close = _get_close(symbol, ind["date"], db_path)
             indicators[symbol] = {
@@ -232,7 +244,7 @@ def get_dashboard_data(db_path=None):
             }
 
     # Asset rotation signal
-    rotation = asset_rotation(db_path=db_path)
+    rotation = asset_rotation(db_path=db_path, stages=stage_infos)
 
     # Volume breadth
     from asset_revesting.core.signals import volume_check
@@ -263,7 +275,7 @@ def get_dashboard_data(db_path=None):
     }
 
     # Intermarket warnings
-    warnings = check_intermarket_warnings(db_path=db_path)
+    warnings = check_intermarket_warnings(db_path=db_path, stages=stage_infos)
 
     # Trade history
     trades = get_trade_history(20, db_path)
@@ -271,11 +283,14 @@ def get_dashboard_data(db_path=None):
     # Recent equity curve from daily_log
     with get_connection(db_path) as conn:
         equity_rows = conn.execute("""
-            SELECT date, equity FROM daily_log
-            ORDER BY date DESC LIMIT 120
+            SELECT date, equity FROM (
+                SELECT date, equity FROM daily_log
+                ORDER BY date DESC LIMIT 120
+            ) sub
+            ORDER BY date ASC
         """).fetchall()
 
-    equity_curve = [{"date": r["date"], "equity": r["equity"]} for r in reversed(equity_rows)]
+    equity_curve = [{"date": r["date"], "equity": r["equity"]} for r in equity_rows]
 
     # Build position response dict (enriched with ATR stop recommendation if applicable)
     position_response = None
@@ -316,9 +331,8 @@ def get_dashboard_data(db_path=None):
             from asset_revesting.config import (
                 USE_ATR_STOPS, ATR_MULTIPLIER, ATR_MIN_STOP_PCT, ATR_MAX_STOP_PCT
             )
-            from asset_revesting.core.backtester import _get_atr
             if USE_ATR_STOPS and pos["entry_price"] and pos["stop"]:
-                atr = _get_atr(pos["symbol"], pos["entry_date"], db_path)
+                atr = get_latest_atr(pos["symbol"], pos["entry_date"], db_path)
                 if atr:
                     raw_dist = ATR_MULTIPLIER * atr
                     min_dist = pos["entry_price"] * ATR_MIN_STOP_PCT
@@ -11,10 +11,16 @@ This creates a persistent background job that:
 No cron, no manual setup. Just click "Enable" in the dashboard.
 """
 
+import io
 import os
 import sys
+import functools
+import logging
 import subprocess
 import plistlib
+import signal
+import time
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
 
@@ -23,6 +29,111 @@ from asset_revesting.data.database import get_connection
 PLIST_NAME = "com.assetrevesting.dailyreport"
 PLIST_PATH = Path.home() / "Library" / "LaunchAgents" / f"{PLIST_NAME}.plist"
 LOG_DIR = Path.home() / "Library" / "Logs" / "AssetRevesting"
+REPORT_LOG = LOG_DIR / "report.log"
+
+# launchd per-user GUI domain, e.g. "gui/501" (uid never changes in-process)
+_GUI_DOMAIN = f"gui/{os.getuid()}" if hasattr(os, "getuid") else "gui/0"
+REPORT_LOG_MAX_BYTES = 1_000_000
+REPORT_LOG_BACKUPS = 3
+
+# Last launchctl probe — launchd state rarely changes between dashboard refreshes
+_STATUS_TTL = 5.0
+_STATUS_CACHE = {"ts": 0.0, "mtime": None, "active": False}
+
+# Last "last run" line scanned out of report.log, keyed by the log's mtime
+_LOG_TAIL_BYTES = 8192
+_LAST_RUN_CACHE = {"mtime": None, "line": None}
+
+# launchd Weekday numbering: 0=Sun ... 6=Sat
+_DAY_NAMES = ("Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat")
+
+
+def configure_report_logging():
+    """
+    Attach a size-bounded rotating handler for report.log to the root logger
+    and forward print() output to it line by line.
+    launchd appends stdout forever, so the scheduled report (`report --log`)
+    logs through this handler instead and rotation happens in-process.
+    """
+    root = logging.getLogger()
+    target = str(REPORT_LOG)
+    for handler in root.handlers:
+        if isinstance(handler, RotatingFileHandler) and handler.baseFilename == target:
+            return handler
+
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        target, maxBytes=REPORT_LOG_MAX_BYTES, backupCount=REPORT_LOG_BACKUPS
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+    sys.stdout = _LogWriter(logging.getLogger("asset_revesting.report"))
+    return handler
+
+
+class _LogWriter(io.TextIOBase):
+    """stdout stand-in that logs each complete printed line at INFO."""
+
+    def __init__(self, logger):
+        self._logger = logger
+        self._pending = ""
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        *lines, self._pending = (self._pending + text).split("\n")
+        for line in lines:
+            if line.strip():
+                self._logger.info(line.rstrip())
+        return len(text)
+
+    def flush(self):
+        if self._pending.strip():
+            self._logger.info(self._pending.rstrip())
+        self._pending = ""
+
+
+def _launchctl(*args, timeout=10):
+    """
+    Run a launchctl subcommand. Nothing sensitive is open, so inherited FDs
+    are left alone rather than paying for the close-all-fds loop on spawn.
+    """
+    return subprocess.run(
+        ["launchctl", *args],
+        capture_output=True, text=True, timeout=timeout, close_fds=False
+    )
+
+
+def _launchctl_returncode(*args, timeout=5):
+    """
+    Exit status of a launchctl subcommand whose output we don't need.
+    Uses posix_spawn with output sent to /dev/null, skipping subprocess'
+    fork/pipe setup; falls back to _launchctl where posix_spawn is missing.
+    """
+    if not hasattr(os, "posix_spawnp"):
+        return _launchctl(*args, timeout=timeout).returncode
+
+    devnull = [(os.POSIX_SPAWN_OPEN, fd, os.devnull, os.O_WRONLY, 0) for fd in (1, 2)]
+    pid = os.posix_spawnp("launchctl", ["launchctl", *args], os.environ,
+                          file_actions=devnull)
+    # Poll with a growing sleep, as Popen.wait(timeout) does; the child is
+    # only killed from this thread while still unreaped, so its PID is ours
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    while True:
+        reaped, status = os.waitpid(pid, os.WNOHANG)
+        if reaped:
+            return os.waitstatus_to_exitcode(status)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            raise subprocess.TimeoutExpired(["launchctl", *args], timeout)
+        delay = min(delay * 2, remaining, 0.05)
+        time.sleep(delay)
 
 
 def _get_python_path():
@@ -51,36 +162,37 @@ def _get_schedule_config(db_path=None):
     return {"hour": hour, "minute": minute, "days": days}
 
 
-def install_schedule(db_path=None):
-    """
-    Install macOS LaunchAgent for daily report.
-    Returns status dict.
-    """
-    sched = _get_schedule_config(db_path)
-    python_path = _get_python_path()
-    project_dir = _get_project_dir()
+def _format_days(days):
+    """Format weekday numbers as e.g. 'Mon, Tue, Wed'."""
+    return ", ".join(_DAY_NAMES[d] if 0 <= d < 7 else str(d) for d in sorted(days))
 
-    # Create log directory
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
 
+@functools.lru_cache(maxsize=4)
+def _build_plist_bytes(hour, minute, days, python_path, project_dir):
+    """
+    Serialized LaunchAgent plist for a schedule. Cached, since re-installs
+    with the same settings (e.g. reopening the dashboard) rebuild the same bytes.
+    """
     # Build calendar intervals for each scheduled day
     # macOS LaunchAgent uses: Weekday (0=Sun, 1=Mon, ... 6=Sat)
     calendar_intervals = []
-    for day in sched["days"]:
+    for day in days:
         calendar_intervals.append({
             "Weekday": day,
-            "Hour": sched["hour"],
-            "Minute": sched["minute"],
+            "Hour": hour,
+            "Minute": minute,
         })
 
     # Build the plist — calls Python directly, no shell script needed
     plist = {
         "Label": PLIST_NAME,
         "ProgramArguments": [
-            python_path, "-m", "asset_revesting.run", "report",
+            python_path, "-m", "asset_revesting.run", "report", "--log",
         ],
         "StartCalendarInterval": calendar_intervals,
-        "StandardOutPath": str(LOG_DIR / "report.log"),
+        # report.log is written by configure_report_logging() (--log) with
+        # rotation, printed output included
+        "StandardOutPath": os.devnull,
         "StandardErrorPath": str(LOG_DIR / "report_err.log"),
         "WorkingDirectory": project_dir,
         "EnvironmentVariables": {
@@ -89,62 +201,142 @@ def install_schedule(db_path=None):
         },
     }
 
+    # Binary plists are smaller and quicker for launchd to parse
+    return plistlib.dumps(plist, fmt=plistlib.FMT_BINARY)
+
+
+def install_schedule(db_path=None):
+    """
+    Install macOS LaunchAgent for daily report.
+    Returns status dict.
+    """
+    sched = _get_schedule_config(db_path)
+    python_path = _get_python_path()
+    project_dir = _get_project_dir()
+
+    # Create log directory
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+
     # Ensure LaunchAgents directory exists
     PLIST_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+    plist_bytes = _build_plist_bytes(
+        sched["hour"], sched["minute"], tuple(sched["days"]), python_path, project_dir
+    )
+
+    # Format schedule for display
+    days_display = _format_days(sched["days"])
+    time_display = f"{sched['hour']:02d}:{sched['minute']:02d}"
+    ok_result = {
+        "status": "ok",
+        "message": f"Scheduled at {time_display} on {days_display}",
+        "schedule": f"{time_display} on {days_display}",
+        "plist_path": str(PLIST_PATH),
+        "log_path": str(REPORT_LOG),
+        "installed": True,
+    }
+
+    # Same plist already loaded — nothing for launchctl to do
+    try:
+        unchanged = PLIST_PATH.read_bytes() == plist_bytes
+    except OSError:
+        unchanged = False
+    if unchanged and _is_agent_loaded():
+        return {**ok_result, "unchanged": True}
+
     # Unload existing if present
     if PLIST_PATH.exists():
         try:
-            subprocess.run(
-                ["launchctl", "unload", str(PLIST_PATH)],
-                capture_output=True, timeout=10
-            )
+            _launchctl("bootout", _GUI_DOMAIN, str(PLIST_PATH))
         except Exception:
             pass
 
     # Write plist
-    with open(PLIST_PATH, "wb") as f:
-        plistlib.dump(plist, f)
+    PLIST_PATH.write_bytes(plist_bytes)
 
     # Load it
-    result = subprocess.run(
-        ["launchctl", "load", str(PLIST_PATH)],
-        capture_output=True, text=True, timeout=10
-    )
+    result = _launchctl("bootstrap", _GUI_DOMAIN, str(PLIST_PATH))
+    _reset_status_cache()
 
     if result.returncode != 0:
         return {
             "status": "error",
-            "message": f"launchctl load failed: {result.stderr.strip()}",
+            "message": f"launchctl bootstrap failed: {result.stderr.strip()}",
             "plist_path": str(PLIST_PATH),
         }
 
-    # Format schedule for display
-    day_names = {0: "Sun", 1: "Mon", 2: "Tue", 3: "Wed", 4: "Thu", 5: "Fri", 6: "Sat"}
-    days_display = ", ".join(day_names.get(d, str(d)) for d in sorted(sched["days"]))
-    time_display = f"{sched['hour']:02d}:{sched['minute']:02d}"
+    return ok_result
 
-    return {
-        "status": "ok",
-        "message": f"Scheduled at {time_display} on {days_display}",
-        "schedule": f"{time_display} on {days_display}",
-        "plist_path": str(PLIST_PATH),
-        "log_path": str(LOG_DIR / "report.log"),
-        "installed": True,
-    }
+
+def _reset_status_cache():
+    """Force the next get_schedule_status() to re-probe launchctl."""
+    _STATUS_CACHE.update(ts=0.0, mtime=None, active=False)
+
+
+def _is_agent_loaded():
+    """
+    Whether launchd has our agent loaded. Skips the launchctl fork while the
+    plist is missing, or unchanged and probed within the last _STATUS_TTL seconds.
+    """
+    try:
+        mtime = PLIST_PATH.stat().st_mtime
+    except OSError:
+        return False
+
+    now = time.monotonic()
+    if _STATUS_CACHE["mtime"] == mtime and now - _STATUS_CACHE["ts"] < _STATUS_TTL:
+        return _STATUS_CACHE["active"]
+
+    active = False
+    try:
+        # "print" on the service target exits non-zero when it isn't loaded
+        active = _launchctl_returncode("print", f"{_GUI_DOMAIN}/{PLIST_NAME}") == 0
+    except Exception:
+        pass
+
+    _STATUS_CACHE.update(ts=now, mtime=mtime, active=active)
+    return active
+
+
+def _read_last_run():
+    """
+    Find the most recent report line in report.log. Only the last
+    _LOG_TAIL_BYTES are read, and the answer is reused until the log changes.
+    """
+    try:
+        mtime = REPORT_LOG.stat().st_mtime
+    except OSError:
+        return None
+    if _LAST_RUN_CACHE["mtime"] == mtime:
+        return _LAST_RUN_CACHE["line"]
+
+    last_run = None
+    try:
+        with open(REPORT_LOG, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - _LOG_TAIL_BYTES))
+            tail = f.read().decode("utf-8", errors="replace")
+        # Look for our report header timestamps
+        for line in reversed(tail.splitlines()):
+            if "DAILY REPORT" in line or "Report emailed" in line or "report" in line.lower():
+                last_run = line.strip()[:80]
+                break
+    except Exception:
+        return None
+
+    _LAST_RUN_CACHE.update(mtime=mtime, line=last_run)
+    return last_run
 
 
 def uninstall_schedule():
     """Remove the LaunchAgent."""
     if PLIST_PATH.exists():
         try:
-            subprocess.run(
-                ["launchctl", "unload", str(PLIST_PATH)],
-                capture_output=True, timeout=10
-            )
+            _launchctl("bootout", _GUI_DOMAIN, str(PLIST_PATH))
         except Exception:
             pass
         PLIST_PATH.unlink(missing_ok=True)
+        _reset_status_cache()
 
     # Clean up old shell script if it exists (from earlier versions)
     project_dir = _get_project_dir()
@@ -163,48 +355,27 @@ def get_schedule_status():
     installed = PLIST_PATH.exists()
 
     # Check if actually loaded
-    active = False
-    if installed:
-        try:
-            result = subprocess.run(
-                ["launchctl", "list", PLIST_NAME],
-                capture_output=True, text=True, timeout=5
-            )
-            active = result.returncode == 0
-        except Exception:
-            pass
+    active = _is_agent_loaded() if installed else False
 
     # Get schedule info
     schedule_info = None
     if installed:
         try:
             sched = _get_schedule_config()
-            day_names = {0: "Sun", 1: "Mon", 2: "Tue", 3: "Wed", 4: "Thu", 5: "Fri", 6: "Sat"}
-            days_display = ", ".join(day_names.get(d, str(d)) for d in sorted(sched["days"]))
+            days_display = _format_days(sched["days"])
             time_display = f"{sched['hour']:02d}:{sched['minute']:02d}"
             schedule_info = f"{time_display} on {days_display}"
         except Exception:
             schedule_info = "Unknown"
 
     # Check last run from log
-    last_run = None
-    log_file = LOG_DIR / "report.log"
-    if log_file.exists():
-        try:
-            text = log_file.read_text()
-            # Look for our report header timestamps
-            for line in reversed(text.splitlines()):
-                if "DAILY REPORT" in line or "Report emailed" in line or "report" in line.lower():
-                    last_run = line.strip()[:80]
-                    break
-        except Exception:
-            pass
+    last_run = _read_last_run()
 
     return {
         "installed": installed,
         "active": active,
         "schedule": schedule_info,
         "plist_path": str(PLIST_PATH) if installed else None,
-        "log_path": str(LOG_DIR / "report.log"),
+        "log_path": str(REPORT_LOG),
         "last_run": last_run,
     }
@@ -6,6 +6,10 @@ Implements the four-pillar confluence check, asset rotation logic,
 and all entry/exit signal rules from Signal Logic Spec v1.1 Sections 4-5.
 """
 
+from functools import lru_cache
+
+import numpy as np
+
 from asset_revesting.config import (
     EQUITY_SYMBOLS, EQUITY_INVERSE_SYMBOLS, BOND_SYMBOLS,
     DOLLAR_SYMBOLS, CASH_SYMBOL,
@@ -25,9 +29,11 @@ from asset_revesting.core.stage_analysis import (
     determine_stage, get_all_stages, print_stage_summary,
 )
 from asset_revesting.core.indicators import (
-    get_latest_indicators, get_latest_vix, get_latest_volume,
+    get_latest_indicators, get_latest_indicators_multi,
+    get_latest_indicators_with_prev, get_latest_vix, get_latest_volume,
+    get_snapshot,
 )
-from asset_revesting.data.database import get_connection
+from asset_revesting.data.database import get_connection, cached_reads, run_cached
 
 
 # Signal constants
@@ -43,13 +49,25 @@ HOLD = "HOLD"
 # PILLAR 1: TREND CHECK
 # =============================================================================
 
-def trend_check(symbol, direction=LONG, as_of_date=None, db_path=None):
-    """Check if SMA relationships support the trade direction."""
-    ind = get_latest_indicators(symbol, as_of_date, db_path)
+def trend_check(symbol, direction=LONG, as_of_date=None, db_path=None,
+                verbose=False, snapshot=None):
+    """
+    Check if SMA relationships support the trade direction.
+    The per-condition details string is only built when verbose=True.
+    A get_snapshot() result for the symbol skips the indicator/close lookups.
+    """
+    if snapshot is not None:
+        ind = snapshot["indicators"]
+    else:
+        # Same fetch check_sma_crossover uses, so a cached run shares it
+        ind = get_latest_indicators_with_prev(symbol, as_of_date, db_path)[0]
     if ind is None:
         return {"favorable": False, "score": 0, "details": "No data"}
 
-    close = _get_close(symbol, ind["date"], db_path)
+    if snapshot is not None:
+        close = snapshot["close"]
+    else:
+        close = _get_close(symbol, ind["date"], db_path)
     if close is None:
         return {"favorable": False, "score": 0, "details": "No close price"}
 
@@ -67,38 +85,90 @@ def trend_check(symbol, direction=LONG, as_of_date=None, db_path=None):
             close > sma_5, sma_5 > sma_20, close > sma_50,
             close > sma_150, close > sma_200,
         ]
-        labels = [
-            f"Close({close:.2f})>SMA5({sma_5:.2f})",
-            f"SMA5>SMA20({sma_20:.2f})",
-            f"Close>SMA50({sma_50:.2f})",
-            f"Close>SMA150({sma_150:.2f})",
-            f"Close>SMA200({sma_200:.2f})",
-        ]
     else:
         conditions = [
             close < sma_5, sma_5 < sma_20, close < sma_50,
             close < sma_150, close < sma_200,
         ]
-        labels = [
-            f"Close({close:.2f})<SMA5({sma_5:.2f})",
-            f"SMA5<SMA20({sma_20:.2f})",
-            f"Close<SMA50({sma_50:.2f})",
-            f"Close<SMA150({sma_150:.2f})",
-            f"Close<SMA200({sma_200:.2f})",
-        ]
 
     score = sum(conditions)
-    details = "; ".join(f"{'Y' if c else 'N'} {l}" for c, l in zip(conditions, labels))
+    details = None
+    if verbose:
+        op = ">" if direction == LONG else "<"
+        labels = [
+            f"Close({close:.2f}){op}SMA5({sma_5:.2f})",
+            f"SMA5{op}SMA20({sma_20:.2f})",
+            f"Close{op}SMA50({sma_50:.2f})",
+            f"Close{op}SMA150({sma_150:.2f})",
+            f"Close{op}SMA200({sma_200:.2f})",
+        ]
+        details = "; ".join(f"{'Y' if c else 'N'} {l}" for c, l in zip(conditions, labels))
     return {"favorable": score >= TREND_MIN_CONDITIONS, "score": score, "details": details}
 
 
+def trend_check_batch(symbol, dates, direction=LONG, db_path=None):
+    """
+    Vectorized trend_check over many as-of dates (for backtest loops).
+    Reads the symbol's indicator/close history once and scores every date
+    with NumPy column comparisons instead of one query + five scalar
+    comparisons per date.
+
+    Args:
+        dates: iterable of 'YYYY-MM-DD' as-of dates
+
+    Returns:
+        dict: {favorable: bool array, score: int array}, aligned with dates
+    """
+    dates = np.asarray(list(dates), dtype=str)
+    empty = {"favorable": np.zeros(len(dates), dtype=bool),
+             "score": np.zeros(len(dates), dtype=int)}
+    if len(dates) == 0:
+        return empty
+
+    with get_connection(db_path) as conn:
+        rows = conn.execute("""
+            SELECT i.date, p.close, i.sma_5, i.sma_20, i.sma_50, i.sma_150, i.sma_200
+            FROM indicators i
+            LEFT JOIN prices p ON p.symbol = i.symbol AND p.date = i.date
+            WHERE i.symbol = ? AND i.date <= ?
+            ORDER BY i.date ASC
+        """, (symbol, str(max(dates)))).fetchall()
+    if not rows:
+        return empty
+
+    row_dates = np.array([r[0] for r in rows], dtype=str)
+    # NULLs become NaN, which fails every comparison below
+    a = np.array([tuple(r)[1:] for r in rows], dtype="float64")
+    close, sma_5, sma_20, sma_50, sma_150, sma_200 = a.T
+
+    if direction == LONG:
+        conditions = (close > sma_5, sma_5 > sma_20, close > sma_50,
+                      close > sma_150, close > sma_200)
+    else:
+        conditions = (close < sma_5, sma_5 < sma_20, close < sma_50,
+                      close < sma_150, close < sma_200)
+    valid = ~np.isnan(a).any(axis=1)
+    row_score = np.where(valid, np.sum(conditions, axis=0), 0)
+
+    # Latest indicator row on or before each as-of date
+    idx = np.searchsorted(row_dates, dates, side="right") - 1
+    has_row = idx >= 0
+    score = np.where(has_row, row_score[np.maximum(idx, 0)], 0)
+    return {"favorable": has_row & (score >= TREND_MIN_CONDITIONS), "score": score}
+
+
 # =============================================================================
 # PILLAR 2: VOLATILITY CHECK
 # =============================================================================
 
-def volatility_check(direction=LONG, symbol=None, as_of_date=None, db_path=None):
-    """Check if VIX regime and Bollinger Bands support the trade."""
-    vix = get_latest_vix(as_of_date, db_path)
+def volatility_check(direction=LONG, symbol=None, as_of_date=None, db_path=None,
+                     verbose=False, snapshot=None):
+    """
+    Check if VIX regime and Bollinger Bands support the trade.
+    The details string is only built when verbose=True.
+    A get_snapshot() result for symbol skips the VIX/indicator lookups.
+    """
+    vix = snapshot["vix"] if snapshot is not None else get_latest_vix(as_of_date, db_path)
     if vix is None:
         return {"favorable": False, "vix_regime": None, "vix_trend": None, "details": "No VIX data"}
 
@@ -107,7 +177,10 @@ def volatility_check(direction=LONG, symbol=None, as_of_date=None, db_path=None)
 
     bb_pct_b = None
     if symbol:
-        ind = get_latest_indicators(symbol, as_of_date, db_path)
+        if snapshot is not None:
+            ind = snapshot["indicators"]
+        else:
+            ind = get_latest_indicators(symbol, as_of_date, db_path)
         if ind:
             bb_pct_b = ind.get("bb_percent_b")
 
@@ -118,9 +191,11 @@ def volatility_check(direction=LONG, symbol=None, as_of_date=None, db_path=None)
     else:
         favorable = regime in ("HIGH", "EXTREME") and trend == "RISING"
 
-    details = f"VIX:{regime}/{trend}"
-    if bb_pct_b is not None:
-        details += f" BB%B:{bb_pct_b:.2f}"
+    details = None
+    if verbose:
+        details = f"VIX:{regime}/{trend}"
+        if bb_pct_b is not None:
+            details += f" BB%B:{bb_pct_b:.2f}"
     return {"favorable": favorable, "vix_regime": regime, "vix_trend": trend, "details": details}
 
 
@@ -128,9 +203,13 @@ def volatility_check(direction=LONG, symbol=None, as_of_date=None, db_path=None)
 # PILLAR 3: VOLUME CHECK
 # =============================================================================
 
-def volume_check(direction=LONG, as_of_date=None, db_path=None):
-    """Check if NYSE volume ratios support the trade direction."""
-    vol = get_latest_volume(as_of_date, db_path)
+def volume_check(direction=LONG, as_of_date=None, db_path=None, verbose=False, snapshot=None):
+    """
+    Check if NYSE volume ratios support the trade direction.
+    The details string is only built when verbose=True.
+    A get_snapshot() result skips the volume lookup.
+    """
+    vol = snapshot["volume"] if snapshot is not None else get_latest_volume(as_of_date, db_path)
     flags = []
 
     if vol is None:
@@ -152,7 +231,9 @@ def volume_check(direction=LONG, as_of_date=None, db_path=None):
     else:
         favorable = fr is not None and fr >= VOLUME_FOMO_THRESHOLD
 
-    details = f"Panic={pr:.2f} FOMO={fr:.2f}" if pr and fr else "Partial data"
+    details = None
+    if verbose:
+        details = f"Panic={pr:.2f} FOMO={fr:.2f}" if pr and fr else "Partial data"
     return {"favorable": favorable, "panic_ratio": pr, "fomo_ratio": fr, "flags": flags, "details": details}
 
 
@@ -162,22 +243,10 @@ def volume_check(direction=LONG, as_of_date=None, db_path=None):
 
 def check_sma_crossover(symbol, as_of_date=None, db_path=None):
     """Check if 5-SMA crossed above/below 20-SMA."""
-    with get_connection(db_path) as conn:
-        if as_of_date:
-            rows = conn.execute("""
-                SELECT date, sma_5, sma_20 FROM indicators
-                WHERE symbol = ? AND date <= ? ORDER BY date DESC LIMIT 2
-            """, (symbol, as_of_date)).fetchall()
-        else:
-            rows = conn.execute("""
-                SELECT date, sma_5, sma_20 FROM indicators
-                WHERE symbol = ? ORDER BY date DESC LIMIT 2
-            """, (symbol,)).fetchall()
-
-    if len(rows) < 2:
+    today, yesterday = get_latest_indicators_with_prev(symbol, as_of_date, db_path)
+    if today is None or yesterday is None:
         return {"bullish_cross": False, "bearish_cross": False, "details": "Insufficient data"}
 
-    today, yesterday = rows[0], rows[1]
     if any(v is None for v in [today["sma_5"], today["sma_20"], yesterday["sma_5"], yesterday["sma_20"]]):
         return {"bullish_cross": False, "bearish_cross": False, "details": "Missing SMA data"}
 
@@ -191,10 +260,10 @@ def check_sma_crossover(symbol, as_of_date=None, db_path=None):
 # EQUITY PICK
 # =============================================================================
 
-def equity_pick(as_of_date=None, db_path=None):
+def equity_pick(as_of_date=None, db_path=None, ind_cache=None):
     """Choose SPY or QQQ based on distance from 50-SMA."""
-    spy = get_latest_indicators("SPY", as_of_date, db_path)
-    qqq = get_latest_indicators("QQQ", as_of_date, db_path)
+    spy = _lookup_indicators("SPY", as_of_date, db_path, ind_cache)
+    qqq = _lookup_indicators("QQQ", as_of_date, db_path, ind_cache)
     spy_rs = spy.get("relative_strength") if spy else None
     qqq_rs = qqq.get("relative_strength") if qqq else None
 
@@ -207,19 +276,46 @@ def equity_pick(as_of_date=None, db_path=None):
 # FOUR-PILLAR ENTRY SIGNAL
 # =============================================================================
 
-def entry_signal(symbol, direction=LONG, stage_info=None, as_of_date=None, db_path=None):
-    """Evaluate four-pillar confluence for entry."""
+def entry_signal(symbol, direction=LONG, stage_info=None, as_of_date=None, db_path=None,
+                 verbose=False, snapshot=None):
+    """
+    Evaluate four-pillar confluence for entry.
+    The details summary is built for entries (they get reported); with
+    verbose=True it is built for every result and the pillar details
+    strings are filled in too.
+
+    The pillars read one get_snapshot() row (fetched here unless passed in)
+    instead of each querying indicators, close, VIX and volume separately.
+
+    Pillars are checked in order and evaluation stops as soon as the
+    remaining ones can no longer lift the score to ENTRY_MODERATE_THRESHOLD.
+    Skipped pillars are None in pillar_results, and score then only counts
+    the pillars that were evaluated.
+    """
     if stage_info is None:
         stage_info = determine_stage(symbol, as_of_date, db_path)
 
     stage = stage_info["stage"]
     stage_ok = (stage == STAGE_2) if direction == LONG else (stage == STAGE_4)
 
-    trend = trend_check(symbol, direction, as_of_date, db_path)
-    vol = volatility_check(direction, symbol, as_of_date, db_path)
-    volume = volume_check(direction, as_of_date, db_path)
-
-    score = sum([stage_ok, trend["favorable"], vol["favorable"], volume["favorable"]])
+    if snapshot is None:
+        snapshot = get_snapshot(symbol, as_of_date, db_path)
+
+    checks = (
+        lambda: trend_check(symbol, direction, as_of_date, db_path,
+                            verbose=verbose, snapshot=snapshot),
+        lambda: volatility_check(direction, symbol, as_of_date, db_path,
+                                 verbose=verbose, snapshot=snapshot),
+        lambda: volume_check(direction, as_of_date, db_path, verbose, snapshot),
+    )
+    score = int(stage_ok)
+    results = [None] * len(checks)
+    for i, check in enumerate(checks):
+        if score + len(checks) - i < ENTRY_MODERATE_THRESHOLD:
+            break
+        results[i] = check()
+        score += bool(results[i]["favorable"])
+    trend, vol, volume = results
 
     if score >= ENTRY_STRONG_THRESHOLD:
         signal = STRONG_ENTRY
@@ -228,25 +324,39 @@ def entry_signal(symbol, direction=LONG, stage_info=None, as_of_date=None, db_pa
     else:
         signal = NO_ENTRY
 
-    details = (f"Score={score}/4: Stage={'Y' if stage_ok else 'N'}({stage}) "
-               f"Trend={'Y' if trend['favorable'] else 'N'} "
-               f"Vol={'Y' if vol['favorable'] else 'N'} "
-               f"Volume={'Y' if volume['favorable'] else 'N'}")
+    details = None
+    if verbose or signal != NO_ENTRY:
+        details = (f"Score={score}/4: Stage={'Y' if stage_ok else 'N'}({stage}) "
+                   f"Trend={_pillar_flag(trend)} "
+                   f"Vol={_pillar_flag(vol)} "
+                   f"Volume={_pillar_flag(volume)}")
 
     return {
-        "signal": signal, "score": score,
+        "signal": signal,
+        "score": score,
         "pillar_results": {"stage": stage_ok, "trend": trend, "volatility": vol, "volume": volume},
-        "flags": volume.get("flags", []),
+        "flags": volume.get("flags", []) if volume else [],
         "details": details,
     }
 
 
+def _pillar_flag(result):
+    """Y/N for an evaluated pillar, '-' for one entry_signal skipped."""
+    if result is None:
+        return "-"
+    return "Y" if result["favorable"] else "N"
+
+
 # =============================================================================
 # ASSET ROTATION
 # =============================================================================
 
-def asset_rotation(as_of_date=None, db_path=None):
-    """Determine which asset to enter. Single asset, check tiers in order."""
+def asset_rotation(as_of_date=None, db_path=None, stages=None, verbose=False):
+    """
+    Determine which asset to enter. Single asset, check tiers in order.
+    Pass stages (a get_all_stages() result) to skip recomputing them;
+    verbose is passed on to entry_signal().
+    """
     # VIX emergency gate — no entries when VIX is in emergency territory
     vix = get_latest_vix(as_of_date, db_path)
     if vix:
@@ -258,15 +368,18 @@ def asset_rotation(as_of_date=None, db_path=None):
                     "crossover": None,
                     "reason": f"VIX emergency ({vix_close:.1f} > {VIX_EMERGENCY_LEVEL}) — cash only"}
 
-    stages = get_all_stages(as_of_date, db_path)
+    if stages is None:
+        stages = get_all_stages(as_of_date, db_path)
 
     spy_stage = stages.get("SPY", {}).get("stage", TRANSITIONAL)
     qqq_stage = stages.get("QQQ", {}).get("stage", TRANSITIONAL)
 
     # Tier 1: Equities long
     if spy_stage == STAGE_2 or qqq_stage == STAGE_2:
-        equity = equity_pick(as_of_date, db_path)
-        sig = entry_signal(equity, LONG, stages.get(equity), as_of_date, db_path)
+        # One query for both candidates equity_pick compares
+        ind_cache = get_latest_indicators_multi(EQUITY_SYMBOLS, as_of_date, db_path)
+        equity = equity_pick(as_of_date, db_path, ind_cache)
+        sig = entry_signal(equity, LONG, stages.get(equity), as_of_date, db_path, verbose=verbose)
         if sig["signal"] in (STRONG_ENTRY, MODERATE_ENTRY):
             return {"asset": equity, "direction": LONG, "tier": 1,
                     "signal_strength": sig["signal"], "entry_details": sig,
@@ -275,7 +388,7 @@ def asset_rotation(as_of_date=None, db_path=None):
 
     # Tier 1: Equities inverse
     if spy_stage == STAGE_4:
-        sig = entry_signal("SPY", LONG_INVERSE, stages.get("SPY"), as_of_date, db_path)
+        sig = entry_signal("SPY", LONG_INVERSE, stages.get("SPY"), as_of_date, db_path, verbose=verbose)
         if sig["signal"] in (STRONG_ENTRY, MODERATE_ENTRY):
             inv = EQUITY_INVERSE_SYMBOLS.get("SPY", "SH")
             return {"asset": inv, "direction": LONG_INVERSE, "tier": 1,
@@ -285,7 +398,7 @@ def asset_rotation(as_of_date=None, db_path=None):
 
     # Tier 2: Bonds
     if stages.get("TLT", {}).get("stage") == STAGE_2:
-        sig = entry_signal("TLT", LONG, stages.get("TLT"), as_of_date, db_path)
+        sig = entry_signal("TLT", LONG, stages.get("TLT"), as_of_date, db_path, verbose=verbose)
         if sig["signal"] in (STRONG_ENTRY, MODERATE_ENTRY):
             return {"asset": "TLT", "direction": LONG, "tier": 2,
                     "signal_strength": sig["signal"], "entry_details": sig,
@@ -295,7 +408,7 @@ def asset_rotation(as_of_date=None, db_path=None):
     # Tier 3: Dollar
     uup_stage = stages.get("UUP", {}).get("stage", TRANSITIONAL)
     if uup_stage == STAGE_2:
-        sig = entry_signal("UUP", LONG, stages.get("UUP"), as_of_date, db_path)
+        sig = entry_signal("UUP", LONG, stages.get("UUP"), as_of_date, db_path, verbose=verbose)
         if sig["signal"] in (STRONG_ENTRY, MODERATE_ENTRY):
             return {"asset": "UUP", "direction": LONG, "tier": 3,
                     "signal_strength": sig["signal"], "entry_details": sig,
@@ -303,7 +416,7 @@ def asset_rotation(as_of_date=None, db_path=None):
                     "reason": f"UUP Stage 2, score {sig['score']}/4"}
 
     if uup_stage == STAGE_4 and stages.get("UDN", {}).get("stage") == STAGE_2:
-        sig = entry_signal("UDN", LONG, stages.get("UDN"), as_of_date, db_path)
+        sig = entry_signal("UDN", LONG, stages.get("UDN"), as_of_date, db_path, verbose=verbose)
         if sig["signal"] in (STRONG_ENTRY, MODERATE_ENTRY):
             return {"asset": "UDN", "direction": LONG, "tier": 3,
                     "signal_strength": sig["signal"], "entry_details": sig,
@@ -360,8 +473,12 @@ def calc_trade_params(entry_price, direction, stage, atr=None):
 # EXIT CHECKS
 # =============================================================================
 
-def check_exits(position, current_close, current_date, symbol, as_of_date=None, db_path=None):
-    """Check all exit conditions. Returns highest-priority exit or None."""
+def check_exits(position, current_close, current_date, symbol, stage_info=None,
+                as_of_date=None, db_path=None):
+    """
+    Check all exit conditions. Returns highest-priority exit or None.
+    Pass stage_info (a determine_stage() result for symbol) to skip recomputing it.
+    """
 
     # Priority 1: VIX Emergency
     vix = get_latest_vix(as_of_date, db_path)
@@ -376,7 +493,8 @@ def check_exits(position, current_close, current_date, symbol, as_of_date=None,
                 "details": f"Close {current_close:.2f} <= Stop {position['stop']:.2f}"}
 
     # Priority 3: Stage Change
-    stage_info = determine_stage(symbol, as_of_date, db_path)
+    if stage_info is None:
+        stage_info = determine_stage(symbol, as_of_date, db_path)
     stage = stage_info["stage"]
     if position["direction"] == LONG and stage in (STAGE_3, STAGE_4):
         return {"action": "FULL_EXIT", "reason": "STAGE_CHANGE", "exit_pct": 1.0,
@@ -411,9 +529,15 @@ def check_exits(position, current_close, current_date, symbol, as_of_date=None,
 # INTERMARKET WARNINGS
 # =============================================================================
 
-def check_intermarket_warnings(as_of_date=None, db_path=None):
-    """Check intermarket conditions. Returns list of warning strings."""
+def check_intermarket_warnings(as_of_date=None, db_path=None, stages=None):
+    """
+    Check intermarket conditions. Returns list of warning strings.
+    Pass stages (a get_all_stages() result) to skip recomputing them.
+    """
     warnings = []
+    if stages is None:
+        stages = get_all_stages(as_of_date, db_path)
+    spy_stage = stages["SPY"]
 
     xlu = get_latest_indicators("XLU", as_of_date, db_path)
     spy = get_latest_indicators("SPY", as_of_date, db_path)
@@ -427,13 +551,11 @@ def check_intermarket_warnings(as_of_date=None, db_path=None):
 
     gld = get_latest_indicators("GLD", as_of_date, db_path)
     if gld:
-        gld_stage = determine_stage("GLD", as_of_date, db_path)
-        spy_stage = determine_stage("SPY", as_of_date, db_path)
+        gld_stage = stages.get("GLD") or determine_stage("GLD", as_of_date, db_path)
         if gld_stage["stage"] == STAGE_2 and spy_stage["stage"] == STAGE_3:
             warnings.append("COMMODITY CYCLE: Gold rising while equities in distribution")
 
-    spy_stage = determine_stage("SPY", as_of_date, db_path)
-    tlt_stage = determine_stage("TLT", as_of_date, db_path)
+    tlt_stage = stages["TLT"]
     if spy_stage["stage"] == STAGE_4 and tlt_stage["stage"] == STAGE_4:
         warnings.append("DIVERGENCE: Both stocks and bonds declining — check UUP/dollar")
 
@@ -446,11 +568,18 @@ def check_intermarket_warnings(as_of_date=None, db_path=None):
 
 def print_daily_report(as_of_date=None, db_path=None):
     """Print the full daily signal report."""
+    # Every section re-reads the same symbols/date — memoize for this run
+    with cached_reads():
+        _print_daily_report(as_of_date, db_path)
+
+
+def _print_daily_report(as_of_date=None, db_path=None):
     print("=" * 60)
     print(f"DAILY SIGNAL REPORT")
     print("=" * 60)
 
-    # Stages
+    # Stages — computed once and shared by every section below
+    stages = get_all_stages(as_of_date, db_path)
     print_stage_summary(as_of_date, db_path)
 
     # VIX
@@ -462,7 +591,7 @@ def print_daily_report(as_of_date=None, db_path=None):
         print()
 
     # Asset Rotation
-    rotation = asset_rotation(as_of_date, db_path)
+    rotation = asset_rotation(as_of_date, db_path, stages, verbose=True)
     print("=== ASSET ROTATION ===\n")
     print(f"  Recommendation: {rotation['asset']} ({rotation['direction']})")
     print(f"  Tier: {rotation['tier']}")
@@ -472,6 +601,10 @@ def print_daily_report(as_of_date=None, db_path=None):
     if rotation["entry_details"]:
         print(f"\n  Pillar Details:")
         print(f"    {rotation['entry_details']['details']}")
+        pillars = rotation["entry_details"]["pillar_results"]
+        for name in ("trend", "volatility", "volume"):
+            if pillars[name] and pillars[name]["details"]:
+                print(f"    {name.capitalize()}: {pillars[name]['details']}")
         cross = rotation.get("crossover")
         if cross:
             if cross["bullish_cross"]:
@@ -481,7 +614,6 @@ def print_daily_report(as_of_date=None, db_path=None):
 
     # Trade params if entry
     if rotation["direction"] != HOLD and rotation["entry_details"]:
-        stages = get_all_stages(as_of_date, db_path)
         asset = rotation["asset"]
         # Get price for the traded asset
         ind = get_latest_indicators(asset, as_of_date, db_path)
@@ -497,7 +629,7 @@ def print_daily_report(as_of_date=None, db_path=None):
                 print(f"    Trail Stop:   {params['trailing_pct']*100:.0f}% after partial")
 
     # Warnings
-    warnings = check_intermarket_warnings(as_of_date, db_path)
+    warnings = check_intermarket_warnings(as_of_date, db_path, stages)
     if warnings:
         print(f"\n=== WARNINGS ===\n")
         for w in warnings:
@@ -512,6 +644,14 @@ def print_daily_report(as_of_date=None, db_path=None):
 # HELPERS
 # =============================================================================
 
+def _lookup_indicators(symbol, as_of_date, db_path, ind_cache=None):
+    """Latest indicators from a pre-fetched {symbol: row} map, else from the DB."""
+    if ind_cache is not None and symbol in ind_cache:
+        return ind_cache[symbol]
+    return get_latest_indicators(symbol, as_of_date, db_path)
+
+
+@run_cached
 def _get_close(symbol, date_str, db_path=None):
     with get_connection(db_path) as conn:
         row = conn.execute(
@@ -530,8 +670,9 @@ def _get_open(symbol, date_str, db_path=None):
         return row["open"] if row else None
 
 
+@lru_cache(maxsize=4096)
 def _business_days_between(start_date, end_date):
-    from datetime import datetime
-    d1 = datetime.strptime(start_date, "%Y-%m-%d") if isinstance(start_date, str) else start_date
-    d2 = datetime.strptime(end_date, "%Y-%m-%d") if isinstance(end_date, str) else end_date
-    return max(1, int((d2 - d1).days * 5 / 7))
+    """Weekdays from start_date up to (not including) end_date, at least 1."""
+    d1 = np.datetime64(start_date, "D")
+    d2 = np.datetime64(end_date, "D")
+    return max(1, int(np.busday_count(d1, d2)))
@@ -0,0 +1,198 @@
+# asset_revesting/core/signals_batch.py
+"""
+Layer 3b — Vectorized Signal Evaluation
+
+Evaluates asset_rotation() for a whole series of dates at once. Indicators,
+closes, stages, VIX and volume are each loaded with one query, aligned
+"as of" every requested date, and the four pillars are scored as column
+operations instead of per-day entry_signal() calls.
+
+Reads the stages table, so compute_stage_history() must have run first.
+Mirrors the tier logic in signals.asset_rotation — keep the two in step.
+"""
+
+import numpy as np
+import pandas as pd
+
+from asset_revesting.config import (
+    ANALYSIS_SYMBOLS, EQUITY_INVERSE_SYMBOLS, CASH_SYMBOL,
+    ENTRY_STRONG_THRESHOLD, ENTRY_MODERATE_THRESHOLD, TREND_MIN_CONDITIONS,
+    VIX_EMERGENCY_LEVEL, VOLUME_PANIC_THRESHOLD, VOLUME_FOMO_THRESHOLD,
+)
+from asset_revesting.data.database import get_connection
+from asset_revesting.core.stage_analysis import STAGE_CODES, STAGE_2, STAGE_4, TRANSITIONAL
+from asset_revesting.core.signals import (
+    STRONG_ENTRY, MODERATE_ENTRY, NO_ENTRY, LONG, LONG_INVERSE, HOLD,
+)
+
+
+# =============================================================================
+# LOADING
+# =============================================================================
+
+def _load_frames(end_date, db_path=None):
+    """One query per table, everything up to end_date."""
+    placeholders = ", ".join("?" for _ in ANALYSIS_SYMBOLS)
+    with get_connection(db_path) as conn:
+        ind = pd.read_sql_query(f"""
+            SELECT i.symbol, i.date, p.close, i.sma_5, i.sma_20, i.sma_50,
+                   i.sma_150, i.sma_200, i.bb_percent_b, i.relative_strength
+            FROM indicators i
+            LEFT JOIN prices p ON p.symbol = i.symbol AND p.date = i.date
+            WHERE i.symbol IN ({placeholders}) AND i.date <= ?
+        """, conn, params=[*ANALYSIS_SYMBOLS, end_date], parse_dates=["date"])
+        stages = pd.read_sql_query(f"""
+            SELECT symbol, date, stage FROM stages
+            WHERE symbol IN ({placeholders}) AND date <= ? AND confirmed = 1
+        """, conn, params=[*ANALYSIS_SYMBOLS, end_date], parse_dates=["date"])
+        vix = pd.read_sql_query("""
+            SELECT date, vix_close, vix_regime, vix_trend FROM vix_indicators
+            WHERE date <= ?
+        """, conn, params=[end_date], parse_dates=["date"])
+        volume = pd.read_sql_query("""
+            SELECT date, panic_ratio, fomo_ratio, fomo_ratio_ma FROM volume_indicators
+            WHERE date <= ?
+        """, conn, params=[end_date], parse_dates=["date"])
+    return ind, stages, vix, volume
+
+
+def _asof(frame, dates):
+    """Latest row on or before each date (whole rows, like the scalar getters)."""
+    return frame.sort_index().reindex(dates, method="ffill")
+
+
+# =============================================================================
+# PILLARS
+# =============================================================================
+
+def _trend_favorable(ind, direction):
+    """Five SMA conditions per row; any missing value fails the pillar."""
+    close, sma_5, sma_20 = ind["close"], ind["sma_5"], ind["sma_20"]
+    sma_50, sma_150, sma_200 = ind["sma_50"], ind["sma_150"], ind["sma_200"]
+    if direction == LONG:
+        conditions = [close > sma_5, sma_5 > sma_20, close > sma_50,
+                      close > sma_150, close > sma_200]
+    else:
+        conditions = [close < sma_5, sma_5 < sma_20, close < sma_50,
+                      close < sma_150, close < sma_200]
+    valid = ind[["close", "sma_5", "sma_20", "sma_50", "sma_150", "sma_200"]].notna().all(axis=1)
+    return valid & (sum(c.astype(int) for c in conditions) >= TREND_MIN_CONDITIONS)
+
+
+def _vol_favorable(vix, ind, direction):
+    regime, trend = vix["vix_regime"], vix["vix_trend"]
+    if direction == LONG:
+        vix_ok = regime.isin(["LOW", "NORMAL"]) | ((regime == "ELEVATED") & (trend == "FALLING"))
+        bb = ind["bb_percent_b"]
+        bb_ok = bb.isna() | ((bb >= 0) & (bb <= 1))
+        return vix_ok & bb_ok
+    return regime.isin(["HIGH", "EXTREME"]) & (trend == "RISING")
+
+
+def _volume_favorable(volume, direction):
+    # No volume data at all leaves the pillar neutral (favorable)
+    missing = volume["present"].isna()
+    if direction == LONG:
+        panic = volume["panic_ratio"] >= VOLUME_PANIC_THRESHOLD
+        no_euphoria = volume["fomo_ratio_ma"] < 2.0
+        return missing | panic | no_euphoria
+    return missing | (volume["fomo_ratio"] >= VOLUME_FOMO_THRESHOLD)
+
+
+# =============================================================================
+# ROTATION
+# =============================================================================
+
+def evaluate_rotation_series(dates, db_path=None):
+    """
+    asset_rotation() for every date in dates, computed column-wise.
+
+    Args:
+        dates: iterable of 'YYYY-MM-DD' as-of dates
+
+    Returns:
+        pd.DataFrame indexed by the given dates with columns
+        asset, direction, tier, signal_strength, score (NaN when in cash)
+    """
+    dates = list(dates)
+    columns = ["asset", "direction", "tier", "signal_strength", "score"]
+    if not dates:
+        return pd.DataFrame(columns=columns)
+
+    idx = pd.DatetimeIndex(pd.to_datetime(dates))
+    ind, stages, vix, volume = _load_frames(max(dates), db_path)
+
+    ind_at = {
+        symbol: _asof(group.drop(columns="symbol").set_index("date"), idx)
+        for symbol, group in ind.groupby("symbol")
+    }
+    empty_ind = pd.DataFrame(np.nan, index=idx, columns=ind.columns.drop(["symbol", "date"]))
+    ind_at = {s: ind_at.get(s, empty_ind) for s in ANALYSIS_SYMBOLS}
+
+    # Confirmed stage = latest confirmed row per symbol, carried forward
+    # (compared as the integer codes stored in the stages table)
+    stage_2, stage_4 = STAGE_CODES[STAGE_2], STAGE_CODES[STAGE_4]
+    stage_wide = stages.pivot_table(index="date", columns="symbol", values="stage",
+                                    aggfunc="last").sort_index().ffill()
+    stage_at = _asof(stage_wide, idx).reindex(columns=ANALYSIS_SYMBOLS).fillna(STAGE_CODES[TRANSITIONAL])
+
+    vix_at = _asof(vix.set_index("date"), idx)
+    volume_at = _asof(volume.assign(present=1.0).set_index("date"), idx)
+
+    def score(symbol, direction):
+        stage_ok = stage_at[symbol] == (stage_2 if direction == LONG else stage_4)
+        return (stage_ok.astype(int)
+                + _trend_favorable(ind_at[symbol], direction).astype(int)
+                + _vol_favorable(vix_at, ind_at[symbol], direction).astype(int)
+                + _volume_favorable(volume_at, direction).astype(int)).to_numpy()
+
+    def is_entry(s):
+        return s >= ENTRY_MODERATE_THRESHOLD
+
+    # VIX emergency gate
+    emergency = ((vix_at["vix_close"] > VIX_EMERGENCY_LEVEL)
+                 & (vix_at["vix_trend"] == "RISING")).to_numpy()
+
+    spy_stage = stage_at["SPY"].to_numpy()
+    qqq_stage = stage_at["QQQ"].to_numpy()
+    uup_stage = stage_at["UUP"].to_numpy()
+
+    # Tier 1 equity pick: QQQ only when its relative strength beats SPY's
+    qqq_rs = ind_at["QQQ"]["relative_strength"].to_numpy()
+    spy_rs = ind_at["SPY"]["relative_strength"].to_numpy()
+    pick_qqq = qqq_rs > spy_rs
+    equity_score = np.where(pick_qqq, score("QQQ", LONG), score("SPY", LONG))
+    equity = np.where(pick_qqq, "QQQ", "SPY")
+
+    inverse_score = score("SPY", LONG_INVERSE)
+    tlt_score = score("TLT", LONG)
+    uup_score = score("UUP", LONG)
+    udn_score = score("UDN", LONG)
+
+    tiers = [
+        (emergency, CASH_SYMBOL, HOLD, 4, np.full(len(idx), np.nan)),
+        (((spy_stage == stage_2) | (qqq_stage == stage_2)) & is_entry(equity_score),
+         equity, LONG, 1, equity_score),
+        ((spy_stage == stage_4) & is_entry(inverse_score),
+         EQUITY_INVERSE_SYMBOLS.get("SPY", "SH"), LONG_INVERSE, 1, inverse_score),
+        ((stage_at["TLT"].to_numpy() == stage_2) & is_entry(tlt_score),
+         "TLT", LONG, 2, tlt_score),
+        ((uup_stage == stage_2) & is_entry(uup_score),
+         "UUP", LONG, 3, uup_score),
+        ((uup_stage == stage_4) & (stage_at["UDN"].to_numpy() == stage_2) & is_entry(udn_score),
+         "UDN", LONG, 3, udn_score),
+    ]
+    conds = [t[0] for t in tiers]
+
+    chosen_score = np.select(conds, [t[4] for t in tiers], default=np.nan)
+    strength = np.where(chosen_score >= ENTRY_STRONG_THRESHOLD, STRONG_ENTRY,
+                        np.where(chosen_score >= ENTRY_MODERATE_THRESHOLD,
+                                 MODERATE_ENTRY, NO_ENTRY))
+
+    return pd.DataFrame({
+        "asset": np.select(conds, [t[1] for t in tiers], default=CASH_SYMBOL),
+        "direction": np.select(conds, [t[2] for t in tiers], default=HOLD),
+        "tier": np.select(conds, [t[3] for t in tiers], default=4),
+        "signal_strength": strength,
+        "score": chosen_score,
+    }, index=pd.Index(dates, name="date"))
@@ -8,13 +8,22 @@ SMA relationships, slope thresholds, and moving average ordering.
 Implements Signal Logic Spec v1.1 Section 3.
 """
 
+from itertools import repeat
+
+import numpy as np
 import pandas as pd
 from asset_revesting.config import (
     STAGE_SLOPE_THRESHOLD, STAGE_CONFIRMATION_DAYS, SLOPE_LOOKBACK,
     ANALYSIS_SYMBOLS
 )
-from asset_revesting.data.database import get_connection
-from asset_revesting.core.indicators import get_latest_indicators, get_indicator_history
+from asset_revesting.data.database import (
+    get_connection, run_cached, drop_stage_indexes, create_stage_indexes,
+    is_refreshing,
+)
+from asset_revesting.core.indicators import (
+    get_latest_indicators, get_latest_indicators_multi, get_indicator_history,
+)
+from asset_revesting._jit import njit
 
 
 # Stage constants
@@ -24,185 +33,375 @@ STAGE_3 = "STAGE_3"
 STAGE_4 = "STAGE_4"
 TRANSITIONAL = "TRANSITIONAL"
 
+# Integer encoding stored in stages.stage and used by the array kernels;
+# the public API still returns the names above
+STAGE_CODES = {TRANSITIONAL: 0, STAGE_1: 1, STAGE_2: 2, STAGE_3: 3, STAGE_4: 4}
+STAGE_NAMES = {code: name for name, code in STAGE_CODES.items()}
+
+# UPSERT that leaves identical rows untouched, so reruns don't rewrite history
+_SQL_INSERT_STAGE = """
+    INSERT INTO stages (symbol, date, stage, confirmed, consecutive_days)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(symbol, date) DO UPDATE SET
+        stage = excluded.stage,
+        confirmed = excluded.confirmed,
+        consecutive_days = excluded.consecutive_days
+    WHERE stages.stage IS NOT excluded.stage
+       OR stages.confirmed IS NOT excluded.confirmed
+       OR stages.consecutive_days IS NOT excluded.consecutive_days
+"""
+
+
+# Everything determine_stage needs from stages, tagged by kind
+_SQL_STAGE_CONTEXT = """
+    SELECT 'today' AS kind, stage, confirmed, consecutive_days FROM stages
+    WHERE symbol = :symbol AND date = :date
+    UNION ALL
+    SELECT * FROM (
+        SELECT 'last_confirmed', stage, confirmed, consecutive_days FROM stages
+        WHERE symbol = :symbol AND date < :date AND confirmed = 1
+        ORDER BY date DESC LIMIT 1
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT 'prev', stage, confirmed, consecutive_days FROM stages
+        WHERE symbol = :symbol AND date < :date
+        ORDER BY date DESC LIMIT 1
+    )
+"""
+
+
+def _make_classifier(threshold):
+    """
+    Build classify_stage() with the slope thresholds it compares against
+    precomputed, so each call skips the global lookup and multiplies.
+    """
+    thr, neg_thr = threshold, -threshold
+    thr_x2, thr_x1_5 = threshold * 2, threshold * 1.5
+
+    def classify_stage(ind):
+        """
+        Determine the raw stage for a single date's indicator values.
+        Does NOT apply confirmation logic.
+        
+        Args:
+            ind: dict with keys: close, sma_50, sma_150, sma_200,
+                 sma_150_slope, sma_200_slope, sma_50_slope
+        
+        Returns:
+            str: STAGE_1, STAGE_2, STAGE_3, STAGE_4, or TRANSITIONAL
+        """
+        close = ind.get("close")
+        sma_50 = ind.get("sma_50")
+        sma_150 = ind.get("sma_150")
+        sma_200 = ind.get("sma_200")
+        slope_150 = ind.get("sma_150_slope")
+        slope_200 = ind.get("sma_200_slope")
+        slope_50 = ind.get("sma_50_slope")
+
+        if (close is None or sma_50 is None or sma_150 is None or sma_200 is None
+                or slope_150 is None or slope_200 is None):
+            return TRANSITIONAL
+
+        # Conditions are summed as ints (True == 1) — no per-call lists
+        # --- STAGE 2: Advancing ---
+        s2 = ((close > sma_150)
+              + (close > sma_200)
+              + (slope_150 > thr)
+              + (sma_50 > sma_150 and sma_150 > sma_200)
+              + (slope_200 > neg_thr))
+        if s2 >= 4:
+            return STAGE_2
+
+        # --- STAGE 4: Declining ---
+        s4 = ((close < sma_150)
+              + (close < sma_200)
+              + (slope_150 < neg_thr)
+              + (sma_50 < sma_150 and sma_150 < sma_200)
+              + (slope_200 < thr))
+        if s4 >= 4:
+            return STAGE_4
+
+        # --- STAGE 3: Distribution ---
+        s3 = ((abs(slope_150) <= thr_x2)
+              + (slope_50 is not None and slope_50 < thr)
+              + (sma_50 < sma_150)
+              + (slope_200 > neg_thr))
+        if s3 >= 3:
+            return STAGE_3
+
+        # --- STAGE 1: Accumulation ---
+        s1 = ((abs(slope_150) <= thr)
+              + (abs(slope_200) <= thr_x1_5)
+              + (sma_150 > 0 and abs(close - sma_150) / sma_150 * 100 < 3.0))
+        if s1 >= 2:
+            return STAGE_1
+
+        return TRANSITIONAL
+
+    return classify_stage
 
-def classify_stage(ind):
+
+classify_stage = _make_classifier(STAGE_SLOPE_THRESHOLD)
+
+
+def classify_stage_vectorized(df):
     """
-    Determine the raw stage for a single date's indicator values.
+    classify_stage() for every row of a DataFrame at once.
     Does NOT apply confirmation logic.
     
     Args:
-        ind: dict with keys: close, sma_50, sma_150, sma_200,
-             sma_150_slope, sma_200_slope, sma_50_slope
+        df: DataFrame with columns close, sma_50, sma_150, sma_200,
+            sma_150_slope, sma_200_slope, sma_50_slope (NaN/None = missing)
     
     Returns:
-        str: STAGE_1, STAGE_2, STAGE_3, STAGE_4, or TRANSITIONAL
+        np.ndarray of stage strings, one per row
     """
-    close = ind.get("close")
-    sma_50 = ind.get("sma_50")
-    sma_150 = ind.get("sma_150")
-    sma_200 = ind.get("sma_200")
-    slope_150 = ind.get("sma_150_slope")
-    slope_200 = ind.get("sma_200_slope")
-    slope_50 = ind.get("sma_50_slope")
-
-    if any(v is None for v in [close, sma_50, sma_150, sma_200, slope_150, slope_200]):
-        return TRANSITIONAL
+    close = df["close"].to_numpy(dtype="float64")
+    sma_50 = df["sma_50"].to_numpy(dtype="float64")
+    sma_150 = df["sma_150"].to_numpy(dtype="float64")
+    sma_200 = df["sma_200"].to_numpy(dtype="float64")
+    slope_150 = df["sma_150_slope"].to_numpy(dtype="float64")
+    slope_200 = df["sma_200_slope"].to_numpy(dtype="float64")
+    slope_50 = df["sma_50_slope"].to_numpy(dtype="float64")
+
+    # NaN fails every comparison, matching the scalar "is not None and" guards
+    missing = np.isnan(np.stack([close, sma_50, sma_150, sma_200, slope_150, slope_200])).any(axis=0)
 
     threshold = STAGE_SLOPE_THRESHOLD
 
-    # --- STAGE 2: Advancing ---
-    s2 = [
-        close > sma_150,
-        close > sma_200,
-        slope_150 > threshold,
-        sma_50 > sma_150 and sma_150 > sma_200,
-        slope_200 > -threshold,
-    ]
-    if sum(s2) >= 4:
-        return STAGE_2
-
-    # --- STAGE 4: Declining ---
-    s4 = [
-        close < sma_150,
-        close < sma_200,
-        slope_150 < -threshold,
-        sma_50 < sma_150 and sma_150 < sma_200,
-        slope_200 < threshold,
-    ]
-    if sum(s4) >= 4:
-        return STAGE_4
-
-    # --- STAGE 3: Distribution ---
-    s3 = [
-        abs(slope_150) <= threshold * 2,
-        slope_50 is not None and slope_50 < threshold,
-        sma_50 < sma_150,
-        slope_200 is not None and slope_200 > -threshold,
-    ]
-    if sum(s3) >= 3:
-        return STAGE_3
-
-    # --- STAGE 1: Accumulation ---
-    s1 = [
-        abs(slope_150) <= threshold,
-        slope_200 is not None and abs(slope_200) <= threshold * 1.5,
-        sma_150 > 0 and abs(close - sma_150) / sma_150 * 100 < 3.0,
-    ]
-    if sum(s1) >= 2:
-        return STAGE_1
-
-    return TRANSITIONAL
-
-
-def get_close_for_date(symbol, date_str, db_path=None):
-    """Get closing price for a symbol on a specific date."""
-    with get_connection(db_path) as conn:
-        row = conn.execute(
-            "SELECT close FROM prices WHERE symbol = ? AND date = ?",
-            (symbol, date_str)
-        ).fetchone()
-        return row["close"] if row else None
+    s2 = ((close > sma_150).astype(np.int8) + (close > sma_200)
+          + (slope_150 > threshold) + ((sma_50 > sma_150) & (sma_150 > sma_200))
+          + (slope_200 > -threshold))
+    s4 = ((close < sma_150).astype(np.int8) + (close < sma_200)
+          + (slope_150 < -threshold) + ((sma_50 < sma_150) & (sma_150 < sma_200))
+          + (slope_200 < threshold))
+    s3 = ((np.abs(slope_150) <= threshold * 2).astype(np.int8) + (slope_50 < threshold)
+          + (sma_50 < sma_150) + (slope_200 > -threshold))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        near_150 = (sma_150 > 0) & (np.abs(close - sma_150) / sma_150 * 100 < 3.0)
+    s1 = ((np.abs(slope_150) <= threshold).astype(np.int8)
+          + (np.abs(slope_200) <= threshold * 1.5) + near_150)
+
+    return np.select(
+        [missing, s2 >= 4, s4 >= 4, s3 >= 3, s1 >= 2],
+        [TRANSITIONAL, STAGE_2, STAGE_4, STAGE_3, STAGE_1],
+        default=TRANSITIONAL,
+    )
+
+
+@njit(cache=True)
+def _confirm_stages(raw, threshold):
+    """
+    Run the confirmation state machine over a symbol's raw stage codes.
+    A new stage is confirmed after `threshold` consecutive days; TRANSITIONAL
+    days reset the count and keep the last confirmed stage.
+    
+    Args:
+        raw: int8 array of STAGE_CODES, oldest first
+    
+    Returns:
+        tuple: (confirmed_stage codes, confirmed flags, consecutive counts)
+    """
+    n = raw.shape[0]
+    confirmed_stage = np.zeros(n, dtype=np.int8)
+    confirmed = np.zeros(n, dtype=np.bool_)
+    consecutive = np.zeros(n, dtype=np.int64)
+
+    last_confirmed = 0
+    last_raw = -1
+    count = 0
+    for i in range(n):
+        stage = raw[i]
+
+        # Count consecutive days
+        if stage == 0:
+            count = 0
+        elif stage == last_raw:
+            count += 1
+        else:
+            count = 1
+        last_raw = stage
+
+        # Apply confirmation
+        if stage == 0:
+            confirmed[i] = False
+        elif stage == last_confirmed:
+            confirmed[i] = True
+        elif count >= threshold:
+            confirmed[i] = True
+            last_confirmed = stage
+        else:
+            confirmed[i] = False
+
+        confirmed_stage[i] = last_confirmed
+        consecutive[i] = count
+
+    return confirmed_stage, confirmed, consecutive
+
+
+def get_close_for_date(symbol, date_str, db_path=None, conn=None):
+    """
+    Get closing price for a symbol on a specific date.
+    Pass conn to run on a connection the caller already holds.
+    """
+    if conn is None:
+        with get_connection(db_path) as conn:
+            return get_close_for_date(symbol, date_str, conn=conn)
+    row = conn.execute(
+        "SELECT close FROM prices WHERE symbol = ? AND date = ?",
+        (symbol, date_str)
+    ).fetchone()
+    return row["close"] if row else None
 
 
-def determine_stage(symbol, as_of_date=None, db_path=None):
+@run_cached
+def determine_stage(symbol, as_of_date=None, db_path=None, indicators=None):
     """
     Determine the current confirmed stage for a symbol.
     Applies 3-day confirmation rule.
     
+    Args:
+        indicators: optional pre-fetched get_latest_indicators() row for the
+                    same symbol/date, to skip re-querying it
+    
     Returns:
         dict: {stage, raw_stage, consecutive_days, confirmed, date}
     """
-    ind = get_latest_indicators(symbol, as_of_date, db_path)
+    if indicators is not None:
+        ind = dict(indicators)
+    else:
+        ind = get_latest_indicators(symbol, as_of_date, db_path)
     if ind is None:
         return {"stage": TRANSITIONAL, "raw_stage": TRANSITIONAL,
                 "consecutive_days": 0, "confirmed": False, "date": as_of_date}
 
     today = ind["date"]
 
-    # Check if we already computed this date — return cached result
-    with get_connection(db_path) as conn:
-        existing = conn.execute("""
-            SELECT stage, confirmed, consecutive_days FROM stages
-            WHERE symbol = ? AND date = ?
-        """, (symbol, today)).fetchone()
-
-    if existing:
-        # Already computed — look up the confirmed stage
-        with get_connection(db_path) as conn:
-            last_conf = conn.execute("""
-                SELECT stage FROM stages
-                WHERE symbol = ? AND date <= ? AND confirmed = 1
-                ORDER BY date DESC LIMIT 1
-            """, (symbol, today)).fetchone()
+    # One connection for every lookup and the store below; the write lock is
+    # taken up front, so a commit from another thread between the read and
+    # the UPSERT can't fail this block with SQLITE_BUSY_SNAPSHOT. During a
+    # refresh, read the last committed rows and skip the store instead —
+    # the refresh rewrites the stages table, today's row included
+    read_only = is_refreshing(db_path)
+    with get_connection(db_path, immediate=not read_only) as conn:
+        # Today's row, last confirmed row before today and previous row — one query
+        lookup = {
+            row["kind"]: row
+            for row in conn.execute(_SQL_STAGE_CONTEXT, {"symbol": symbol, "date": today})
+        }
+        existing = lookup.get("today")
+        last_entry = lookup.get("last_confirmed")
+        recent = lookup.get("prev")
+
+        if existing:
+            # Already computed — confirmed stage is today's if confirmed, else the last one
+            existing_stage = STAGE_NAMES[existing["stage"]]
+            if existing["confirmed"]:
+                confirmed_stage = existing_stage
+            else:
+                confirmed_stage = STAGE_NAMES[last_entry["stage"]] if last_entry else TRANSITIONAL
+            return {
+                "stage": confirmed_stage,
+                "raw_stage": existing_stage,
+                "consecutive_days": existing["consecutive_days"],
+                "confirmed": bool(existing["confirmed"]),
+                "date": today,
+            }
+
+        close = get_close_for_date(symbol, today, conn=conn)
+        if close is not None:
+            ind["close"] = close
+
+        raw_stage = classify_stage(ind)
+
+        # Last confirmed stage (from BEFORE today)
+        last_confirmed = STAGE_NAMES[last_entry["stage"]] if last_entry else TRANSITIONAL
+
+        # Count consecutive days from PREVIOUS day (not today)
+        if recent and recent["stage"] == STAGE_CODES[raw_stage]:
+            consecutive = recent["consecutive_days"] + 1
+        elif raw_stage == TRANSITIONAL:
+            consecutive = 0
+        else:
+            consecutive = 1
+
+        # Apply confirmation
+        if raw_stage == TRANSITIONAL:
+            confirmed_stage = last_confirmed
+            confirmed = False
+        elif raw_stage == last_confirmed:
+            confirmed_stage = last_confirmed
+            confirmed = True
+        elif consecutive >= STAGE_CONFIRMATION_DAYS:
+            confirmed_stage = raw_stage
+            confirmed = True
+        else:
+            confirmed_stage = last_confirmed
+            confirmed = False
+
+        # Store
+        if not read_only:
+            conn.execute(_SQL_INSERT_STAGE,
+                         (symbol, ind["date"], STAGE_CODES[raw_stage],
+                          1 if confirmed else 0, consecutive))
 
-        confirmed_stage = last_conf["stage"] if last_conf else TRANSITIONAL
         return {
             "stage": confirmed_stage,
-            "raw_stage": existing["stage"],
-            "consecutive_days": existing["consecutive_days"],
-            "confirmed": bool(existing["confirmed"]),
-            "date": today,
+            "raw_stage": raw_stage,
+            "consecutive_days": consecutive,
+            "confirmed": confirmed,
+            "date": ind["date"],
         }
 
-    close = get_close_for_date(symbol, today, db_path)
-    if close is not None:
-        ind["close"] = close
 
-    raw_stage = classify_stage(ind)
-
-    # Look up last confirmed stage (from BEFORE today)
-    with get_connection(db_path) as conn:
-        last_entry = conn.execute("""
-            SELECT stage, confirmed, consecutive_days FROM stages
-            WHERE symbol = ? AND date < ? AND confirmed = 1
-            ORDER BY date DESC LIMIT 1
-        """, (symbol, today)).fetchone()
-
-    last_confirmed = last_entry["stage"] if last_entry else TRANSITIONAL
+# Rows classify_stage needs, for every date with a full 200-day history
+_SQL_STAGE_HISTORY_ROWS = """
+    SELECT i.symbol, i.date, p.close, i.sma_50, i.sma_150, i.sma_200,
+           i.sma_150_slope, i.sma_200_slope, i.sma_50_slope
+    FROM indicators i
+    JOIN prices p ON p.symbol = i.symbol AND p.date = i.date
+    WHERE i.symbol IN ({placeholders}) AND i.sma_200 IS NOT NULL
+    ORDER BY i.symbol, i.date ASC
+"""
+_STAGE_HISTORY_COLUMNS = [
+    "symbol", "date", "close", "sma_50", "sma_150", "sma_200",
+    "sma_150_slope", "sma_200_slope", "sma_50_slope",
+]
+_STAGE_FETCH_SIZE = 1000
 
-    # Count consecutive days from PREVIOUS day (not today)
-    with get_connection(db_path) as conn:
-        recent = conn.execute("""
-            SELECT stage, consecutive_days FROM stages
-            WHERE symbol = ? AND date < ?
-            ORDER BY date DESC LIMIT 1
-        """, (symbol, today)).fetchone()
-
-    if recent and recent["stage"] == raw_stage:
-        consecutive = recent["consecutive_days"] + 1
-    elif raw_stage == TRANSITIONAL:
-        consecutive = 0
-    else:
-        consecutive = 1
-
-    # Apply confirmation
-    if raw_stage == TRANSITIONAL:
-        confirmed_stage = last_confirmed
-        confirmed = False
-    elif raw_stage == last_confirmed:
-        confirmed_stage = last_confirmed
-        confirmed = True
-    elif consecutive >= STAGE_CONFIRMATION_DAYS:
-        confirmed_stage = raw_stage
-        confirmed = True
-    else:
-        confirmed_stage = last_confirmed
-        confirmed = False
 
-    # Store
+def _iter_stage_rows(symbols, db_path=None):
+    """Stream (symbol, date, close, SMAs, slopes) tuples for symbols from one query."""
+    sql = _SQL_STAGE_HISTORY_ROWS.format(placeholders=", ".join("?" for _ in symbols))
     with get_connection(db_path) as conn:
-        conn.execute("""
-            INSERT OR REPLACE INTO stages (symbol, date, stage, confirmed, consecutive_days)
-            VALUES (?, ?, ?, ?, ?)
-        """, (symbol, ind["date"], raw_stage, 1 if confirmed else 0, consecutive))
-
-    return {
-        "stage": confirmed_stage,
-        "raw_stage": raw_stage,
-        "consecutive_days": consecutive,
-        "confirmed": confirmed,
-        "date": ind["date"],
-    }
+        # One prepared statement stepped in arraysize batches
+        cursor = conn.cursor()
+        cursor.arraysize = _STAGE_FETCH_SIZE
+        cursor.execute(sql, list(symbols))
+        while True:
+            batch = cursor.fetchmany()
+            if not batch:
+                break
+            for row in batch:
+                yield tuple(row)
+
+
+def _stage_rows_for_symbol(symbol, history):
+    """
+    Classify and confirm one symbol's history.
+    
+    Returns:
+        tuple: (stages rows ready for _SQL_INSERT_STAGE, current confirmed stage)
+    """
+    raw_stages = classify_stage_vectorized(history).tolist()
+    raw_codes = np.array([STAGE_CODES[stage] for stage in raw_stages], dtype=np.int8)
+    confirmed_codes, confirmed, consecutive = _confirm_stages(raw_codes, STAGE_CONFIRMATION_DAYS)
+    rows = list(zip(
+        repeat(symbol), history["date"].tolist(), raw_codes.tolist(),
+        confirmed.astype(int).tolist(), consecutive.tolist(),
+    ))
+    return rows, STAGE_NAMES[int(confirmed_codes[-1])]
 
 
 def compute_stage_history(db_path=None):
@@ -211,77 +410,42 @@ def compute_stage_history(db_path=None):
     Must be called AFTER indicators are computed.
     Processes dates sequentially so confirmation logic works correctly.
     """
-    for symbol in ANALYSIS_SYMBOLS:
-        # Get all dates with full indicators for this symbol
-        with get_connection(db_path) as conn:
-            dates = conn.execute("""
-                SELECT DISTINCT i.date FROM indicators i
-                JOIN prices p ON p.symbol = i.symbol AND p.date = i.date
-                WHERE i.symbol = ? AND i.sma_200 IS NOT NULL
-                ORDER BY i.date ASC
-            """, (symbol,)).fetchall()
-
-        if not dates:
-            print(f"  {symbol}: No indicator data")
-            continue
-
-        last_confirmed = TRANSITIONAL
-        consecutive = 0
-        last_raw = None
-
-        for row in dates:
-            date_str = row["date"]
-
-            # Get indicators for this date
-            ind = get_latest_indicators(symbol, date_str, db_path)
-            if ind is None:
+    # The whole backfill is derived data, so run it with synchronous=OFF and
+    # build the secondary indexes once at the end instead of on every insert
+    with get_connection(db_path, bulk=True) as conn:
+        # Every symbol's history in one query, split by symbol in pandas
+        history = pd.DataFrame(list(_iter_stage_rows(ANALYSIS_SYMBOLS, db_path)),
+                               columns=_STAGE_HISTORY_COLUMNS)
+        groups = dict(tuple(history.groupby("symbol", sort=False)))
+
+        all_rows = []
+        for symbol in ANALYSIS_SYMBOLS:
+            group = groups.get(symbol)
+            if group is None:
+                print(f"  {symbol}: No indicator data")
                 continue
+            rows, last_confirmed = _stage_rows_for_symbol(symbol, group)
+            all_rows.extend(rows)
+            print(f"  {symbol}: {len(rows)} dates processed, current: {last_confirmed}")
 
-            close = get_close_for_date(symbol, date_str, db_path)
-            if close is not None:
-                ind["close"] = close
-
-            raw_stage = classify_stage(ind)
-
-            # Count consecutive days
-            if raw_stage == last_raw and raw_stage != TRANSITIONAL:
-                consecutive += 1
-            elif raw_stage == TRANSITIONAL:
-                consecutive = 0
-            else:
-                consecutive = 1
-            last_raw = raw_stage
-
-            # Apply confirmation
-            if raw_stage == TRANSITIONAL:
-                confirmed_stage = last_confirmed
-                confirmed = False
-            elif raw_stage == last_confirmed:
-                confirmed_stage = last_confirmed
-                confirmed = True
-            elif consecutive >= STAGE_CONFIRMATION_DAYS:
-                confirmed_stage = raw_stage
-                confirmed = True
-                last_confirmed = raw_stage
-            else:
-                confirmed_stage = last_confirmed
-                confirmed = False
-
-            # Store
-            with get_connection(db_path) as conn:
-                conn.execute("""
-                    INSERT OR REPLACE INTO stages (symbol, date, stage, confirmed, consecutive_days)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (symbol, date_str, raw_stage, 1 if confirmed else 0, consecutive))
-
-        print(f"  {symbol}: {len(dates)} dates processed, current: {last_confirmed}")
+        # Store — one executemany for every symbol
+        drop_stage_indexes(conn)
+        conn.executemany(_SQL_INSERT_STAGE, all_rows)
+        create_stage_indexes(conn)
 
 
+@run_cached
 def get_all_stages(as_of_date=None, db_path=None):
     """Get current stage for all analysis symbols."""
     stages = {}
-    for symbol in ANALYSIS_SYMBOLS:
-        stages[symbol] = determine_stage(symbol, as_of_date, db_path)
+    # Every determine_stage call nests into this one write transaction:
+    # one commit for all symbols' stage rows (a plain read during a refresh)
+    with get_connection(db_path, immediate=not is_refreshing(db_path)):
+        # One query for every symbol's latest indicators instead of one each
+        ind_map = get_latest_indicators_multi(ANALYSIS_SYMBOLS, as_of_date, db_path)
+        for symbol in ANALYSIS_SYMBOLS:
+            stages[symbol] = determine_stage(symbol, as_of_date, db_path,
+                                             indicators=ind_map[symbol])
     return stages
 
 
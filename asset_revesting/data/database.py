@@ -5,166 +5,498 @@ SQLite database for storing price data, computed indicators, and trade history.
 
 import sqlite3
 import os
+import shutil
+import threading
+import atexit
+import functools
+import inspect
 from contextlib import contextmanager
 from asset_revesting.config import DB_PATH
 
 
+# Applied once when a pooled connection is opened
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # WAL stays consistent with NORMAL; only the last commits risk loss on power cut
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    # Wait on a writer in another process/thread instead of failing at once
+    "PRAGMA busy_timeout=5000",
+)
+
+# Prepared statements kept per connection (sqlite3 default is 128); pooled
+# connections live for the process, so hot queries are parsed only once
+_STATEMENT_CACHE_SIZE = 256
+
+# Per-thread pool: {db_path: (connection, inode)} plus nesting depth per path
+# (inode None for in-memory databases, which sqlite3 opens for these paths)
+_MEMORY_PATHS = (":memory:", "")
+_local = threading.local()
+
+# Every pooled connection in this process, across threads — closed at exit
+_open_connections = set()
+_open_connections_lock = threading.Lock()
+
+
 def get_db_path(db_path=None):
     """Get the database path, allowing override for testing."""
     return db_path or DB_PATH
 
 
-@contextmanager
-def get_connection(db_path=None):
-    """Context manager for database connections."""
-    conn = sqlite3.connect(get_db_path(db_path))
+def get_price_archive_dir(db_path=None):
+    """Directory of the database's Parquet price archive: <db name>_prices/."""
+    base = os.path.splitext(os.path.abspath(get_db_path(db_path)))[0]
+    return f"{base}_prices"
+
+
+def _open_connection(path):
+    """Open a new connection with the PRAGMA bundle applied."""
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                           cached_statements=_STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA foreign_keys=ON")
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    with _open_connections_lock:
+        _open_connections.add(conn)
+    return conn
+
+
+def _close(conn):
+    with _open_connections_lock:
+        _open_connections.discard(conn)
+    conn.close()
+
+
+@atexit.register
+def _close_all_connections():
+    """Close every pooled connection (the last close checkpoints the WAL)."""
+    with _open_connections_lock:
+        conns = list(_open_connections)
+        _open_connections.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+def _forget_inherited_connections():
+    """
+    In a forked child (e.g. a ProcessPoolExecutor worker), drop the parent's
+    pooled connections without closing them — SQLite handles must not be
+    used across fork, so the child opens its own on first use.
+    """
+    global _local, _open_connections, _open_connections_lock
+    _local = threading.local()
+    _open_connections = set()
+    _open_connections_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_inherited_connections)
+
+
+def _pool():
+    if not hasattr(_local, "connections"):
+        _local.connections = {}
+        _local.depth = {}
+    return _local.connections
+
+
+def _pooled_connection(path):
+    """
+    Return this thread's connection for path, opening it on first use.
+    Reopens if the database file was deleted or replaced since (e.g. reset_db).
+    In-memory databases have no file to check and are kept as opened.
+    """
+    pool = _pool()
+    on_disk = path not in _MEMORY_PATHS
+    try:
+        inode = os.stat(path).st_ino if on_disk else None
+    except OSError:
+        inode = None
+
+    entry = pool.get(path)
+    if entry is not None:
+        conn, cached_inode = entry
+        if not on_disk or (inode is not None and inode == cached_inode):
+            return conn
+        _close(conn)
+
+    conn = _open_connection(path)
+    pool[path] = (conn, os.stat(path).st_ino if on_disk else None)
+    return conn
+
+
+def close_connection(db_path=None):
+    """Close this thread's pooled connection for a database, if open."""
+    path = get_db_path(db_path)
+    entry = _pool().pop(path, None)
+    _local.depth.pop(path, None)
+    if entry is not None:
+        _close(entry[0])
+
+
+@contextmanager
+def get_connection(db_path=None, bulk=False, immediate=False):
+    """
+    Context manager for database connections.
+
+    Connections are pooled per thread, so the page cache and statement cache
+    carry over between calls. The outermost block runs in one explicit
+    transaction; nested blocks on the same thread use savepoints.
+
+    Args:
+        bulk: run the outermost transaction with synchronous=OFF, for
+              backfills that can simply be recomputed if interrupted.
+              Ignored on nested blocks.
+        immediate: start the outermost transaction with BEGIN IMMEDIATE, taking
+              the write lock up front so a read-then-write block can't hit
+              SQLITE_BUSY halfway through. Ignored on nested blocks.
+    """
+    path = get_db_path(db_path)
+    conn = _pooled_connection(path)
+    depth = _local.depth.get(path, 0)
+    savepoint = f"sp_{depth}"
+    bulk = bulk and depth == 0
+
+    if bulk:
+        conn.execute("PRAGMA synchronous=OFF")
+    if depth == 0:
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    else:
+        conn.execute(f"SAVEPOINT {savepoint}")
+    _local.depth[path] = depth + 1
     try:
         yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
+        if conn.in_transaction:
+            conn.execute("COMMIT" if depth == 0 else f"RELEASE {savepoint}")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK" if depth == 0 else f"ROLLBACK TO {savepoint}")
+            if depth > 0:
+                conn.execute(f"RELEASE {savepoint}")
         raise
     finally:
-        conn.close()
+        _local.depth[path] = depth
+        if bulk:
+            conn.execute("PRAGMA synchronous=NORMAL")
+
+
+# Databases with a refresh running in this process: {path: nesting depth}
+_refreshing = {}
+_refreshing_lock = threading.Lock()
+
+
+@contextmanager
+def refreshing(db_path=None):
+    """
+    Mark a data refresh of a database as running for the duration of the block.
+
+    Request-path helpers check is_refreshing() and read the last committed
+    rows without taking the write lock, instead of queueing behind the
+    refresh's long write transaction.
+    """
+    path = get_db_path(db_path)
+    with _refreshing_lock:
+        _refreshing[path] = _refreshing.get(path, 0) + 1
+    try:
+        yield
+    finally:
+        with _refreshing_lock:
+            _refreshing[path] -= 1
+            if not _refreshing[path]:
+                del _refreshing[path]
+
+
+def is_refreshing(db_path=None):
+    """True while a refreshing() block for this database is running."""
+    return get_db_path(db_path) in _refreshing
+
+
+# Per-thread memo for @run_cached read helpers, active only inside cached_reads()
+_read_cache = threading.local()
+
+
+@contextmanager
+def cached_reads():
+    """
+    Memoize @run_cached read helpers for the duration of the block.
+
+    Wrap one report run or dashboard render, where the same symbol/date
+    lookups repeat many times. Nested blocks share the outer cache.
+    """
+    if getattr(_read_cache, "entries", None) is not None:
+        yield
+        return
+    _read_cache.entries = {}
+    try:
+        yield
+    finally:
+        _read_cache.entries = None
+
+
+def run_cached(func):
+    """Decorator: memoize results per argument set inside cached_reads()."""
+    sig = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        entries = getattr(_read_cache, "entries", None)
+        if entries is None:
+            return func(*args, **kwargs)
+
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__module__, func.__qualname__, tuple(bound.arguments.values()))
+        try:
+            hit = key in entries
+        except TypeError:
+            # Unhashable argument (e.g. a pre-fetched row) — don't cache
+            return func(*args, **kwargs)
+
+        if not hit:
+            entries[key] = func(*args, **kwargs)
+        result = entries[key]
+        # Callers may annotate returned rows; keep the cached copy clean
+        return dict(result) if isinstance(result, dict) else result
+
+    return wrapper
+
+
+# Secondary indexes on stages: {name: DDL}. Kept separate so bulk stage
+# backfills can drop them and rebuild once at the end.
+_STAGE_INDEXES = {
+    # "Last confirmed stage" lookups: confirmed rows only, index-only
+    "idx_stages_confirmed": """
+        CREATE INDEX IF NOT EXISTS idx_stages_confirmed
+            ON stages(symbol, date DESC, stage) WHERE confirmed = 1
+    """,
+    # "Previous/today's row" lookups answered from the index alone
+    "idx_stages_lookup": """
+        CREATE INDEX IF NOT EXISTS idx_stages_lookup
+            ON stages(symbol, date, stage, confirmed, consecutive_days)
+    """,
+}
+
+
+def drop_stage_indexes(conn):
+    """Drop the secondary indexes on stages (before a bulk load)."""
+    for name in _STAGE_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def create_stage_indexes(conn):
+    """Create the secondary indexes on stages if missing (after a bulk load)."""
+    for ddl in _STAGE_INDEXES.values():
+        conn.execute(ddl)
+
+
+# Rebuilds a stages table that still stores stage names as TEXT; runs before
+# the schema so the indexes are created on the rebuilt table. One statement per
+# entry, executed inside init_db's transaction so the DROP and RENAME commit
+# together (executescript would COMMIT first and run each in autocommit)
+_SQL_MIGRATE_STAGE_CODES = (
+    """
+    CREATE TABLE stages_new (
+        symbol      TEXT NOT NULL,
+        date        TEXT NOT NULL,
+        stage       INTEGER NOT NULL,
+        confirmed   INTEGER NOT NULL DEFAULT 0,
+        consecutive_days INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (symbol, date)
+    )
+    """,
+    """
+    INSERT INTO stages_new (symbol, date, stage, confirmed, consecutive_days)
+    SELECT symbol, date,
+           CASE stage WHEN 'STAGE_1' THEN 1 WHEN 'STAGE_2' THEN 2
+                      WHEN 'STAGE_3' THEN 3 WHEN 'STAGE_4' THEN 4 ELSE 0 END,
+           confirmed, consecutive_days
+    FROM stages
+    """,
+    "DROP TABLE stages",
+    "ALTER TABLE stages_new RENAME TO stages",
+)
+
+
+def _migrate_stage_codes(conn):
+    """Convert a pre-existing TEXT stages column to integer stage codes."""
+    columns = {row["name"]: row["type"] for row in conn.execute("PRAGMA table_info(stages)")}
+    if columns.get("stage", "").upper() == "TEXT":
+        for statement in _SQL_MIGRATE_STAGE_CODES:
+            conn.execute(statement)
+
+
+# Schema, one statement per entry: run with execute() inside init_db's
+# transaction (executescript would COMMIT it first)
+_SQL_SCHEMA = (
+    """
+    -- Raw daily price data from yfinance
+    CREATE TABLE IF NOT EXISTS prices (
+        symbol      TEXT NOT NULL,
+        date        TEXT NOT NULL,
+        open        REAL,
+        high        REAL,
+        low         REAL,
+        close       REAL,
+        volume      REAL,
+        PRIMARY KEY (symbol, date)
+    )
+    """,
+    """
+    -- VIX daily close (separate because it only has close)
+    CREATE TABLE IF NOT EXISTS vix (
+        date        TEXT NOT NULL PRIMARY KEY,
+        close       REAL NOT NULL
+    )
+    """,
+    """
+    -- NYSE Up/Down Volume (from Barchart + RSP proxy)
+    CREATE TABLE IF NOT EXISTS nyse_volume (
+        date        TEXT NOT NULL PRIMARY KEY,
+        up_volume   REAL,
+        down_volume REAL
+    )
+    """,
+    """
+    -- Computed indicators (one row per symbol per date)
+    CREATE TABLE IF NOT EXISTS indicators (
+        symbol      TEXT NOT NULL,
+        date        TEXT NOT NULL,
+        sma_5       REAL,
+        sma_20      REAL,
+        sma_50      REAL,
+        sma_150     REAL,
+        sma_200     REAL,
+        sma_150_slope REAL,
+        sma_200_slope REAL,
+        sma_50_slope  REAL,
+        bb_upper    REAL,
+        bb_middle   REAL,
+        bb_lower    REAL,
+        bb_bandwidth REAL,
+        bb_percent_b REAL,
+        relative_strength REAL,
+        atr_14      REAL,
+        PRIMARY KEY (symbol, date)
+    )
+    """,
+    """
+    -- VIX indicators
+    CREATE TABLE IF NOT EXISTS vix_indicators (
+        date        TEXT NOT NULL PRIMARY KEY,
+        vix_close   REAL,
+        vix_regime  TEXT,
+        vix_sma_5   REAL,
+        vix_sma_20  REAL,
+        vix_trend   TEXT,
+        vix_daily_change REAL,
+        vix_spike   INTEGER  -- 0 or 1
+    )
+    """,
+    """
+    -- Volume ratio indicators
+    CREATE TABLE IF NOT EXISTS volume_indicators (
+        date            TEXT NOT NULL PRIMARY KEY,
+        panic_ratio     REAL,
+        fomo_ratio      REAL,
+        panic_ratio_ma  REAL,
+        fomo_ratio_ma   REAL
+    )
+    """,
+    """
+    -- Stage analysis results
+    CREATE TABLE IF NOT EXISTS stages (
+        symbol      TEXT NOT NULL,
+        date        TEXT NOT NULL,
+        stage       INTEGER NOT NULL,  -- 1-4 = STAGE_1..STAGE_4, 0 = TRANSITIONAL
+        confirmed   INTEGER NOT NULL DEFAULT 0,  -- 0 or 1
+        consecutive_days INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (symbol, date)
+    )
+    """,
+    """
+    -- Trade history
+    CREATE TABLE IF NOT EXISTS trades (
+        id              INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol          TEXT NOT NULL,
+        direction       TEXT NOT NULL,
+        entry_date      TEXT,
+        entry_price     REAL,
+        exit_date       TEXT,
+        exit_price      REAL,
+        exit_reason     TEXT,
+        shares          REAL,
+        pnl_pct         REAL,
+        pnl_dollar      REAL
+    )
+    """,
+    """
+    -- Portfolio state (single row, updated each day)
+    CREATE TABLE IF NOT EXISTS portfolio_state (
+        id              INTEGER PRIMARY KEY CHECK (id = 1),
+        date            TEXT,
+        state           TEXT NOT NULL DEFAULT 'CASH',
+        cash            REAL NOT NULL DEFAULT 100000,
+        symbol          TEXT,
+        direction       TEXT,
+        entry_date      TEXT,
+        entry_price     REAL,
+        shares          REAL,
+        stop_price      REAL,
+        target_price    REAL,
+        trailing_pct    REAL,
+        partial_exit_pct REAL,
+        vix_cooldown    INTEGER NOT NULL DEFAULT 0,
+        stop_order_date TEXT,  -- date stop-loss order was last placed/renewed with broker
+        last_updated    TEXT
+    )
+    """,
+    """
+    -- Daily log (for equity curve)
+    CREATE TABLE IF NOT EXISTS daily_log (
+        date            TEXT NOT NULL PRIMARY KEY,
+        state           TEXT,
+        equity          REAL,
+        symbol          TEXT,
+        vix_regime      TEXT,
+        signals         TEXT,
+        warnings        TEXT
+    )
+    """,
+    """
+    -- Key/value bookkeeping (last_update_<symbol> fetch watermarks)
+    CREATE TABLE IF NOT EXISTS meta (
+        key             TEXT NOT NULL PRIMARY KEY,
+        value           TEXT
+    )
+    """,
+    """
+    -- Create indexes for common queries
+    -- (prices/indicators/stages lookups by (symbol, date) use the primary keys)
+    CREATE INDEX IF NOT EXISTS idx_trades_entry ON trades(entry_date)
+    """,
+)
 
 
 def init_db(db_path=None):
     """Create all tables if they don't exist."""
     with get_connection(db_path) as conn:
-        conn.executescript("""
-            -- Raw daily price data from yfinance
-            CREATE TABLE IF NOT EXISTS prices (
-                symbol      TEXT NOT NULL,
-                date        TEXT NOT NULL,
-                open        REAL,
-                high        REAL,
-                low         REAL,
-                close       REAL,
-                volume      REAL,
-                PRIMARY KEY (symbol, date)
-            );
-
-            -- VIX daily close (separate because it only has close)
-            CREATE TABLE IF NOT EXISTS vix (
-                date        TEXT NOT NULL PRIMARY KEY,
-                close       REAL NOT NULL
-            );
-
-            -- NYSE Up/Down Volume (from Barchart + RSP proxy)
-            CREATE TABLE IF NOT EXISTS nyse_volume (
-                date        TEXT NOT NULL PRIMARY KEY,
-                up_volume   REAL,
-                down_volume REAL
-            );
-
-            -- Computed indicators (one row per symbol per date)
-            CREATE TABLE IF NOT EXISTS indicators (
-                symbol      TEXT NOT NULL,
-                date        TEXT NOT NULL,
-                sma_5       REAL,
-                sma_20      REAL,
-                sma_50      REAL,
-                sma_150     REAL,
-                sma_200     REAL,
-                sma_150_slope REAL,
-                sma_200_slope REAL,
-                sma_50_slope  REAL,
-                bb_upper    REAL,
-                bb_middle   REAL,
-                bb_lower    REAL,
-                bb_bandwidth REAL,
-                bb_percent_b REAL,
-                relative_strength REAL,
-                atr_14      REAL,
-                PRIMARY KEY (symbol, date)
-            );
-
-            -- VIX indicators
-            CREATE TABLE IF NOT EXISTS vix_indicators (
-                date        TEXT NOT NULL PRIMARY KEY,
-                vix_close   REAL,
-                vix_regime  TEXT,
-                vix_sma_5   REAL,
-                vix_sma_20  REAL,
-                vix_trend   TEXT,
-                vix_daily_change REAL,
-                vix_spike   INTEGER  -- 0 or 1
-            );
-
-            -- Volume ratio indicators
-            CREATE TABLE IF NOT EXISTS volume_indicators (
-                date            TEXT NOT NULL PRIMARY KEY,
-                panic_ratio     REAL,
-                fomo_ratio      REAL,
-                panic_ratio_ma  REAL,
-                fomo_ratio_ma   REAL
-            );
-
-            -- Stage analysis results
-            CREATE TABLE IF NOT EXISTS stages (
-                symbol      TEXT NOT NULL,
-                date        TEXT NOT NULL,
-                stage       TEXT NOT NULL,  -- STAGE_1, STAGE_2, STAGE_3, STAGE_4, TRANSITIONAL
-                confirmed   INTEGER NOT NULL DEFAULT 0,  -- 0 or 1
-                consecutive_days INTEGER NOT NULL DEFAULT 0,
-                PRIMARY KEY (symbol, date)
-            );
-
-            -- Trade history
-            CREATE TABLE IF NOT EXISTS trades (
-                id              INTEGER PRIMARY KEY AUTOINCREMENT,
-                symbol          TEXT NOT NULL,
-                direction       TEXT NOT NULL,
-                entry_date      TEXT,
-                entry_price     REAL,
-                exit_date       TEXT,
-                exit_price      REAL,
-                exit_reason     TEXT,
-                shares          REAL,
-                pnl_pct         REAL,
-                pnl_dollar      REAL
-            );
-
-            -- Portfolio state (single row, updated each day)
-            CREATE TABLE IF NOT EXISTS portfolio_state (
-                id              INTEGER PRIMARY KEY CHECK (id = 1),
-                date            TEXT,
-                state           TEXT NOT NULL DEFAULT 'CASH',
-                cash            REAL NOT NULL DEFAULT 100000,
-                symbol          TEXT,
-                direction       TEXT,
-                entry_date      TEXT,
-                entry_price     REAL,
-                shares          REAL,
-                stop_price      REAL,
-                target_price    REAL,
-                trailing_pct    REAL,
-                partial_exit_pct REAL,
-                vix_cooldown    INTEGER NOT NULL DEFAULT 0,
-                stop_order_date TEXT,  -- date stop-loss order was last placed/renewed with broker
-                last_updated    TEXT
-            );
-
-            -- Daily log (for equity curve)
-            CREATE TABLE IF NOT EXISTS daily_log (
-                date            TEXT NOT NULL PRIMARY KEY,
-                state           TEXT,
-                equity          REAL,
-                symbol          TEXT,
-                vix_regime      TEXT,
-                signals         TEXT,
-                warnings        TEXT
-            );
-
-            -- Create indexes for common queries
-            CREATE INDEX IF NOT EXISTS idx_prices_symbol_date ON prices(symbol, date);
-            CREATE INDEX IF NOT EXISTS idx_indicators_symbol_date ON indicators(symbol, date);
-            CREATE INDEX IF NOT EXISTS idx_stages_symbol_date ON stages(symbol, date);
-            CREATE INDEX IF NOT EXISTS idx_trades_entry ON trades(entry_date);
-        """)
+        # Migrate existing DBs: stages.stage TEXT -> INTEGER codes
+        _migrate_stage_codes(conn)
+
+        for statement in _SQL_SCHEMA:
+            conn.execute(statement)
+        create_stage_indexes(conn)
+
+        # Migrate existing DBs: these duplicated the (symbol, date) primary keys
+        for index in ("idx_prices_symbol_date", "idx_indicators_symbol_date",
+                      "idx_stages_symbol_date"):
+            conn.execute(f"DROP INDEX IF EXISTS {index}")
 
         # Initialize portfolio state if not exists
         conn.execute("""
@@ -191,9 +523,40 @@ def init_db(db_path=None):
         """)
 
 
+_SQL_SET_META = """
+    INSERT INTO meta (key, value) VALUES (?, ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value
+"""
+
+
+def set_meta(values, db_path=None):
+    """Store {key: value} pairs in the meta table."""
+    with get_connection(db_path) as conn:
+        conn.executemany(_SQL_SET_META, values.items())
+
+
+def get_meta(keys, db_path=None):
+    """
+    Read keys from the meta table.
+    
+    Returns:
+        dict: {key: value} for the keys that are set
+    """
+    keys = list(keys)
+    placeholders = ", ".join("?" for _ in keys)
+    with get_connection(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT key, value FROM meta WHERE key IN ({placeholders})", keys
+        ).fetchall()
+    return {key: value for key, value in rows}
+
+
 def reset_db(db_path=None):
     """Drop and recreate all tables. Use for testing only."""
     path = get_db_path(db_path)
+    close_connection(db_path)
     if os.path.exists(path):
         os.remove(path)
+    # The Parquet archive mirrors this database's prices — drop it too
+    shutil.rmtree(get_price_archive_dir(db_path), ignore_errors=True)
     init_db(db_path)
@@ -11,111 +11,243 @@ Timing: All data is end-of-day. Run after market close (4 PM ET).
 Chris's method: signal at close, execute at next day's open.
 """
 
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from datetime import date, datetime, timedelta
+from email.utils import formatdate
+from urllib.parse import unquote
+from zoneinfo import ZoneInfo
+
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
 
+# Optional fetch dependencies — reading stored data works without them
+try:
+    import yfinance as yf
+except ImportError:
+    yf = None
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+try:
+    from bs4 import BeautifulSoup
+    _HAS_BS4 = True
+except ImportError:
+    _HAS_BS4 = False
 
-def _flatten_columns(df):
-    """
-    Flatten MultiIndex columns from yfinance.
-    Newer yfinance may return columns like ('Close', 'SPY') instead of 'Close'.
-    This normalizes to simple column names: Close, Open, High, Low, Volume.
-    """
-    if isinstance(df.columns, pd.MultiIndex):
-        # If grouped by ticker, first level is the field name
-        # Try to flatten by taking just the first level
-        df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
-    return df
 from asset_revesting.config import (
-    YFINANCE_SYMBOLS, VIX_SYMBOL, ALL_SYMBOLS,
-    MIN_HISTORY_DAYS
+    YFINANCE_SYMBOLS, VIX_SYMBOL, ALL_SYMBOLS, WARNING_SYMBOLS,
+    MIN_HISTORY_DAYS, DB_PATH
 )
-from asset_revesting.data.database import get_connection
+from asset_revesting.data.database import (
+    get_connection, get_db_path, get_price_archive_dir, get_meta, set_meta,
+)
+from asset_revesting._jit import njit
+
+
+# yf.download keeps per-call state in module globals, so concurrent calls
+# clobber each other's results — downloads from the fetch_all pool take turns
+_YF_DOWNLOAD_LOCK = threading.Lock()
+
+# Ingestion writes run as one get_connection(bulk=True) transaction per batch:
+# a single commit, synchronous=OFF — the rows can always be re-downloaded.
+# They also BEGIN IMMEDIATE, so the Barchart thread and the price writer in
+# fetch_all queue on the write lock (busy_timeout) instead of upgrading a
+# deferred transaction mid-batch.
+# UPSERTs update rows in place (no DELETE + INSERT) and leave re-fetched
+# days that did not change untouched.
+_SQL_INSERT_PRICE = """
+    INSERT INTO prices (symbol, date, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(symbol, date) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume
+    WHERE excluded.close IS NOT NULL
+      AND (prices.open IS NOT excluded.open
+           OR prices.high IS NOT excluded.high
+           OR prices.low IS NOT excluded.low
+           OR prices.close IS NOT excluded.close
+           OR prices.volume IS NOT excluded.volume)
+"""
+_SQL_INSERT_VIX = """
+    INSERT INTO vix (date, close)
+    VALUES (?, ?)
+    ON CONFLICT(date) DO UPDATE SET close = excluded.close
+    WHERE excluded.close IS NOT NULL AND vix.close IS NOT excluded.close
+"""
+_SQL_INSERT_NYSE_VOLUME = """
+    INSERT INTO nyse_volume (date, up_volume, down_volume)
+    VALUES (?, ?, ?)
+    ON CONFLICT(date) DO UPDATE SET
+        up_volume = excluded.up_volume,
+        down_volume = excluded.down_volume
+"""
 
 
-def fetch_yfinance_prices(symbols=None, start_date=None, end_date=None, db_path=None):
+def _column_values(df, column):
+    """A column as a list of Python floats, NaN (or a missing column) as None."""
+    if column not in df.columns:
+        return [None] * len(df)
+    values = df[column].to_numpy(dtype="float64")
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def _yf_download(*args, **kwargs):
+    """yf.download(), serialized across threads."""
+    if yf is None:
+        raise ImportError("yfinance not installed — run: pip install yfinance")
+    with _YF_DOWNLOAD_LOCK:
+        return yf.download(*args, **kwargs)
+
+
+# "Last Price" label, any tags/whitespace after it, then the value — the same
+# "next text node" the BeautifulSoup walk finds, without building a tree
+_LAST_PRICE_RE = re.compile(r">\s*Last Price\s*(?:<[^>]*>\s*)+(-?\d+(?:\.\d+)?)\s*<")
+
+
+def _parse_last_price(html):
     """
-    Fetch daily OHLCV data for all symbols from yfinance and store in SQLite.
-    
-    Args:
-        symbols: List of ticker symbols. Defaults to ALL_SYMBOLS.
-        start_date: Start date string 'YYYY-MM-DD'. Defaults to MIN_HISTORY_DAYS ago.
-        end_date: End date string 'YYYY-MM-DD'. Defaults to today.
-        db_path: Override database path (for testing).
+    Extract Barchart's "Last Price" value from the page HTML.
+    Tries the regex first; falls back to a BeautifulSoup text walk.
     
     Returns:
-        dict: {symbol: number_of_rows_inserted} for each symbol.
+        float or None if not found
     """
-    if symbols is None:
-        symbols = ALL_SYMBOLS
+    match = _LAST_PRICE_RE.search(html)
+    if match:
+        return float(match.group(1))
     
-    import yfinance as yf
+    if not _HAS_BS4:
+        print("  beautifulsoup4 not installed — run: pip install beautifulsoup4")
+        return None
     
-    if end_date is None:
-        # yfinance end date is EXCLUSIVE — add 1 day to include today's close
-        end_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    text = BeautifulSoup(html, "html.parser").get_text(separator="\n")
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for i, line in enumerate(lines):
+        if line == "Last Price":
+            return float(lines[i + 1])
+    return None
+
+
+# Last Barchart page, kept next to the database. Re-runs within the TTL read
+# it from disk; after that the fetch is conditional (If-Modified-Since).
+_BARCHART_URL = "https://www.barchart.com/stocks/quotes/$ADRN/performance"
+_BARCHART_CACHE = os.path.join(os.path.dirname(DB_PATH), ".barchart_cache.html")
+_BARCHART_CACHE_TTL = 30 * 60  # seconds
+
+
+def _fetch_barchart_html(session):
+    """
+    Barchart page HTML, served from the disk cache when it is fresh.
     
-    if start_date is None:
-        start_date = (datetime.now() - timedelta(days=int(MIN_HISTORY_DAYS * 1.5))).strftime("%Y-%m-%d")
+    Returns:
+        str: page HTML
+    """
+    try:
+        mtime = os.path.getmtime(_BARCHART_CACHE)
+    except OSError:
+        mtime = None
     
-    results = {}
+    if mtime is not None and time.time() - mtime < _BARCHART_CACHE_TTL:
+        with open(_BARCHART_CACHE, encoding="utf-8") as f:
+            return f.read()
     
-    # Download all symbols at once for efficiency
-    print(f"Fetching price data for {len(symbols)} symbols from {start_date} to {end_date}...")
-    data = yf.download(symbols, start=start_date, end=end_date, group_by="ticker", progress=False)
+    headers = {}
+    if mtime is not None:
+        headers["If-Modified-Since"] = formatdate(mtime, usegmt=True)
+    r = session.get(_BARCHART_URL, headers=headers, timeout=30)
     
-    with get_connection(db_path) as conn:
-        for symbol in symbols:
-            try:
-                if len(symbols) == 1:
-                    df = _flatten_columns(data.copy())
-                else:
-                    df = data[symbol].copy()
-                    df = _flatten_columns(df)
-                
-                # Normalize column names to title case
-                df.columns = [c.title() if isinstance(c, str) else c for c in df.columns]
-                
-                df = df.dropna(subset=["Close"])
-                
-                if df.empty:
-                    print(f"  WARNING: No data returned for {symbol}")
-                    results[symbol] = 0
-                    continue
-                
-                rows_inserted = 0
-                for date_idx, row in df.iterrows():
-                    date_str = date_idx.strftime("%Y-%m-%d")
-                    conn.execute("""
-                        INSERT OR REPLACE INTO prices (symbol, date, open, high, low, close, volume)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        symbol, date_str,
-                        float(row["Open"]) if pd.notna(row["Open"]) else None,
-                        float(row["High"]) if pd.notna(row["High"]) else None,
-                        float(row["Low"]) if pd.notna(row["Low"]) else None,
-                        float(row["Close"]),
-                        float(row["Volume"]) if pd.notna(row.get("Volume", None)) else None,
-                    ))
-                    rows_inserted += 1
-                
-                results[symbol] = rows_inserted
-                print(f"  {symbol}: {rows_inserted} rows")
-                
-            except Exception as e:
-                print(f"  ERROR fetching {symbol}: {e}")
-                results[symbol] = 0
+    if r.status_code == 304:
+        os.utime(_BARCHART_CACHE)
+        with open(_BARCHART_CACHE, encoding="utf-8") as f:
+            return f.read()
     
-    return results
+    r.raise_for_status()
+    try:
+        with open(_BARCHART_CACHE, "w", encoding="utf-8") as f:
+            f.write(r.text)
+    except OSError:
+        pass  # caching is best-effort
+    return r.text
 
 
-def fetch_vix(start_date=None, end_date=None, db_path=None):
+# Barchart's quote API: ~1KB of JSON instead of the HTML page. It wants the
+# XSRF-TOKEN cookie (set by any page GET) echoed back as a header.
+_BARCHART_HOME_URL = "https://www.barchart.com/"
+_BARCHART_API_URL = "https://www.barchart.com/proxies/core-api/v1/quotes/get"
+
+
+def _fetch_barchart_api_ratio(session):
     """
-    Fetch VIX daily close from yfinance and store in SQLite.
+    $ADRN last price from Barchart's JSON quote API.
     
     Returns:
-        int: Number of rows inserted.
+        float or None if the API gave no usable value
+    """
+    token = session.cookies.get("XSRF-TOKEN")
+    if token is None:
+        # Bootstrap the cookie once; the session keeps it for later calls
+        session.get(_BARCHART_HOME_URL, timeout=30)
+        token = session.cookies.get("XSRF-TOKEN")
+        if token is None:
+            return None
+    
+    r = session.get(
+        _BARCHART_API_URL,
+        params={"symbols": "$ADRN", "fields": "lastPrice", "raw": "1"},
+        headers={"X-XSRF-TOKEN": unquote(token), "Accept": "application/json"},
+        timeout=30,
+    )
+    r.raise_for_status()
+    quote = r.json()["data"][0]
+    value = quote.get("raw", {}).get("lastPrice", quote.get("lastPrice"))
+    return float(str(value).replace(",", "")) if value is not None else None
+
+
+@lru_cache(maxsize=1)
+def _http_session():
     """
+    Shared keep-alive requests.Session, created on first use.
+    Repeat scrapes reuse the pooled TCP/TLS connection; transient failures
+    are retried with backoff.
+    """
+    if requests is None:
+        raise ImportError("requests not installed — run: pip install requests")
+    
+    session = requests.Session()
+    session.headers.update({"User-Agent": "Mozilla/5.0"})
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                          max_retries=Retry(total=3, backoff_factor=0.3))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _date_strings(df):
+    """Index dates as 'YYYY-MM-DD' strings."""
+    return df.index.strftime("%Y-%m-%d").tolist()
+
+
+def _default_range(start_date=None, end_date=None):
+    """Fill in the default download window: MIN_HISTORY_DAYS * 1.5 back to today."""
     if end_date is None:
         # yfinance end date is EXCLUSIVE — add 1 day to include today's close
         end_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
@@ -123,35 +255,152 @@ def fetch_vix(start_date=None, end_date=None, db_path=None):
     if start_date is None:
         start_date = (datetime.now() - timedelta(days=int(MIN_HISTORY_DAYS * 1.5))).strftime("%Y-%m-%d")
     
-    import yfinance as yf
+    return start_date, end_date
+
+
+# First/last stored day per ticker, VIX included under its ticker
+_SQL_STORED_RANGES = """
+    SELECT symbol, MIN(date) AS first, MAX(date) AS last FROM prices GROUP BY symbol
+    UNION ALL
+    SELECT ?, MIN(date), MAX(date) FROM vix
+"""
+
+
+def _plan_download(tickers, start_date, end_date, db_path=None):
+    """
+    Narrow a download to what the database doesn't have yet.
     
-    print(f"Fetching VIX data from {start_date} to {end_date}...")
-    data = yf.download(VIX_SYMBOL, start=start_date, end=end_date, progress=False)
-    data = _flatten_columns(data)
-    data.columns = [c.title() if isinstance(c, str) else c for c in data.columns]
-    data = data.dropna(subset=["Close"])
+    A ticker whose stored history already reaches back to start_date is
+    fetched from its latest stored day only. That day is re-fetched since
+    it may have been stored intraday — unless the range ends before today
+    and is already complete, in which case the ticker is skipped.
     
-    rows_inserted = 0
+    Returns:
+        tuple: (tickers still to fetch, earliest start date they need)
+    """
+    last_day = (date.fromisoformat(end_date) - timedelta(days=1)).isoformat()
+    range_closed = last_day < date.today().isoformat()
     with get_connection(db_path) as conn:
-        for date_idx, row in data.iterrows():
-            date_str = date_idx.strftime("%Y-%m-%d")
-            conn.execute("""
-                INSERT OR REPLACE INTO vix (date, close)
-                VALUES (?, ?)
-            """, (date_str, float(row["Close"])))
-            rows_inserted += 1
+        stored = {
+            row["symbol"]: (row["first"], row["last"])
+            for row in conn.execute(_SQL_STORED_RANGES, (VIX_SYMBOL,))
+            if row["last"] is not None
+        }
+    
+    starts = {}
+    for ticker in tickers:
+        first, last = stored.get(ticker, (None, None))
+        if first is None or first > start_date:
+            starts[ticker] = start_date
+        elif last < last_day or not range_closed:
+            starts[ticker] = max(start_date, last)
+    return list(starts), min(starts.values(), default=start_date)
+
+
+def _download(symbols, start_date, end_date):
+    """
+    One yf.download for every symbol (yfinance fetches them on its own threads).
     
-    print(f"  VIX: {rows_inserted} rows")
-    return rows_inserted
+    Returns:
+        pd.DataFrame with (ticker, Field) MultiIndex columns, field names title case
+    """
+    data = _yf_download(symbols, start=start_date, end=end_date,
+                        group_by="ticker", threads=True, progress=False)
+    
+    # Resolve the column layout once for every symbol: (ticker, field) or
+    # (field, ticker) MultiIndex, or flat fields for a single symbol
+    if not isinstance(data.columns, pd.MultiIndex):
+        data = pd.concat({symbols[0]: data}, axis=1)
+    elif not data.columns.get_level_values(0).isin(symbols).any():
+        data = data.swaplevel(0, 1, axis=1)
+    return data.rename(columns=str.title, level=1)
+
+
+def _symbol_frame(data, symbol):
+    """One symbol's rows from a _download() result, without missing closes."""
+    return data.xs(symbol, axis=1, level=0).dropna(subset=["Close"])
+
+
+def _iter_price_rows(data, symbols, results, up_to_date=()):
+    """
+    Yield prices rows from a _download() result one symbol at a time,
+    recording each symbol's row count in results as it goes.
+    Symbols in up_to_date were not downloaded and are skipped.
+    """
+    for symbol in symbols:
+        if symbol in up_to_date:
+            print(f"  {symbol}: up to date")
+            results[symbol] = 0
+            continue
+        try:
+            df = _symbol_frame(data, symbol)
+            
+            if df.empty:
+                print(f"  WARNING: No data returned for {symbol}")
+                results[symbol] = 0
+                continue
+            
+            # Whole columns at once
+            columns = (
+                _date_strings(df),
+                _column_values(df, "Open"), _column_values(df, "High"),
+                _column_values(df, "Low"), _column_values(df, "Close"),
+                _column_values(df, "Volume"),
+            )
+        except Exception as e:
+            print(f"  ERROR fetching {symbol}: {e}")
+            results[symbol] = 0
+            continue
+        
+        results[symbol] = len(df)
+        print(f"  {symbol}: {len(df)} rows")
+        yield from zip(repeat(symbol), *columns)
+
+
+def _store_prices(data, symbols, db_path=None, up_to_date=()):
+    """
+    Write symbols' OHLCV rows from a _download() result to prices.
+    
+    Rows stream from _iter_price_rows straight into one executemany, so
+    only the current symbol's columns are materialized at a time.
+    
+    Returns:
+        dict: {symbol: number_of_rows_inserted}
+    """
+    results = {}
+    with get_connection(db_path, bulk=True, immediate=True) as conn:
+        conn.executemany(_SQL_INSERT_PRICE, _iter_price_rows(data, symbols, results, up_to_date))
+    if pq is not None:
+        for symbol, count in results.items():
+            if count:
+                first_year = _symbol_frame(data, symbol).index.min().year
+                _sync_price_parquet(symbol, first_year, db_path)
+    return results
 
 
+def _store_vix(data, db_path=None):
+    """
+    Write VIX closes from a _download() result to the vix table.
+    
+    Returns:
+        int: Number of rows inserted.
+    """
+    df = _symbol_frame(data, VIX_SYMBOL)
+    rows = list(zip(_date_strings(df), _column_values(df, "Close")))
+    with get_connection(db_path, bulk=True, immediate=True) as conn:
+        conn.executemany(_SQL_INSERT_VIX, rows)
+    rows_inserted = len(rows)
+    
+    print(f"  VIX: {rows_inserted} rows")
+    return rows_inserted
 
 
 def scrape_barchart_nyse_ratio(db_path=None):
     """
     Scrape current NYSE advance/decline ratio from Barchart.com ($ADRN).
     
-    Uses BeautifulSoup to parse the performance page and extract "Last Price".
+    Reads the last price from Barchart's JSON quote API, falling back to
+    the performance page's "Last Price" (see _parse_last_price).
     The ratio = advancing volume / declining volume:
     - > 1.0 = more advancing (bullish breadth)
     - < 1.0 = more declining (bearish breadth)
@@ -160,29 +409,18 @@ def scrape_barchart_nyse_ratio(db_path=None):
     
     Called once daily after market close (4 PM ET).
     """
-    import requests
-    
-    try:
-        from bs4 import BeautifulSoup
-    except ImportError:
-        print("  beautifulsoup4 not installed — run: pip install beautifulsoup4")
-        return None
+    session = _http_session()
     
     print("Scraping NYSE A/D ratio from Barchart.com ($ADRN)...")
     
     try:
-        url = "https://www.barchart.com/stocks/quotes/$ADRN/performance"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, timeout=30)
-        soup = BeautifulSoup(r.text, "html.parser")
-        text = soup.get_text(separator="\n")
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        
-        ratio = None
-        for i, line in enumerate(lines):
-            if line == "Last Price":
-                ratio = float(lines[i + 1])
-                break
+        try:
+            ratio = _fetch_barchart_api_ratio(session)
+        except Exception as e:
+            print(f"  Barchart quote API failed ({e}), scraping the page instead")
+            ratio = None
+        if ratio is None:
+            ratio = _parse_last_price(_fetch_barchart_html(session))
         
         if ratio is None:
             print("  Could not find 'Last Price' on Barchart page")
@@ -201,11 +439,8 @@ def scrape_barchart_nyse_ratio(db_path=None):
             up_vol = base_volume
             down_vol = base_volume / ratio if ratio > 0 else base_volume
         
-        with get_connection(db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO nyse_volume (date, up_volume, down_volume)
-                VALUES (?, ?, ?)
-            """, (today, up_vol, down_vol))
+        with get_connection(db_path, immediate=True) as conn:
+            conn.execute(_SQL_INSERT_NYSE_VOLUME, (today, up_vol, down_vol))
         
         return ratio
         
@@ -214,6 +449,72 @@ def scrape_barchart_nyse_ratio(db_path=None):
         return None
 
 
+def _previous_where(values, mask):
+    """
+    For each position, the value at the last earlier position where mask is True.
+    
+    Returns:
+        tuple: (values array, NaN where there is none; bool array of which exist)
+    """
+    positions = np.where(mask, np.arange(len(values)), -1)
+    last = np.maximum.accumulate(positions)
+    prev = np.concatenate(([-1], last[:-1]))
+    exists = prev >= 0
+    return np.where(exists, values[prev], np.nan), exists
+
+
+@njit(cache=True)
+def _breadth_volumes(spy_ret, breadth_pct, spy_volume):
+    """
+    Split SPY volume into synthetic up/down volume from the RSP-SPY spread.
+    
+    Args:
+        spy_ret: SPY daily return per row
+        breadth_pct: RSP return minus SPY return, in percent
+        spy_volume: SPY volume per row
+    
+    Returns:
+        tuple: (up_volume array, down_volume array)
+    """
+    n = spy_volume.shape[0]
+    up = np.empty(n)
+    down = np.empty(n)
+    for i in range(n):
+        b = breadth_pct[i]
+        vol = spy_volume[i]
+        if b > 0:
+            # RSP outperforming → more up volume
+            up_vol = vol * (1.0 + (2.0 if b > 2.0 else b))
+            d = 1.0 - (0.7 if b > 0.7 else b)
+            down_vol = vol * (d if d > 0.3 else 0.3)
+        else:
+            # SPY outperforming → more down volume; a NaN spread floors
+            # up volume at 0.3 and leaves down volume NaN
+            u = 1.0 + (-0.7 if b < -0.7 else b)
+            up_vol = vol * (u if u > 0.3 else 0.3)
+            a = abs(b)
+            down_vol = vol * (1.0 + (2.0 if a > 2.0 else a))
+        
+        # Strong SPY moves amplify the dominant side
+        if spy_ret[i] > 0.01:
+            up_vol *= 1.3
+        elif spy_ret[i] < -0.01:
+            down_vol *= 1.3
+        up[i] = up_vol
+        down[i] = down_vol
+    return up, down
+
+
+# Every stored RSP day with SPY's close/volume on the same date (NULL if none)
+_SQL_RSP_SPY = """
+    SELECT r.date, r.close, s.close, s.volume, s.date IS NOT NULL
+    FROM prices r
+    LEFT JOIN prices s ON s.symbol = 'SPY' AND s.date = r.date
+    WHERE r.symbol = 'RSP'
+    ORDER BY r.date
+"""
+
+
 def _compute_rsp_breadth(db_path=None):
     """
     Compute historical breadth from RSP vs SPY divergence.
@@ -222,75 +523,49 @@ def _compute_rsp_breadth(db_path=None):
     - RSP outperforms → broad participation (healthy)
     - SPY outperforms → narrow mega-cap rally (warning)
     
-    Used to backfill historical data for backtesting.
+    Used to backfill historical data for backtesting. RSP and SPY are read
+    from the prices table, where fetch_all has just stored both.
     """
-    import yfinance as yf
-    
     print("  Computing RSP vs SPY breadth proxy for historical data...")
     
     try:
-        end = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-        start = (datetime.now() - timedelta(days=int(MIN_HISTORY_DAYS * 1.5))).strftime("%Y-%m-%d")
-        
-        rsp_data = yf.download("RSP", start=start, end=end, progress=False)
-        if rsp_data.empty:
+        with get_connection(db_path) as conn:
+            rows = conn.execute(_SQL_RSP_SPY).fetchall()
+        if not rows:
             print("  RSP unavailable")
             return 0
         
-        if hasattr(rsp_data.columns, 'levels') and len(rsp_data.columns.levels) > 1:
-            rsp_data.columns = [c[0] if isinstance(c, tuple) else c for c in rsp_data.columns]
-        rsp_data.columns = [c.title() if isinstance(c, str) else c for c in rsp_data.columns]
-        
-        with get_connection(db_path) as conn:
-            spy_rows = conn.execute(
-                "SELECT date, close, volume FROM prices WHERE symbol='SPY' ORDER BY date"
-            ).fetchall()
-        
-        if not spy_rows:
+        # RSP rows in order, with SPY's close/volume on the same date (NaN if none)
+        dates, rsp_close, spy_close, spy_volume, has_spy = (list(c) for c in zip(*rows))
+        if not any(has_spy):
             return 0
+        rsp_dates = np.array(dates, dtype=object)
+        rsp_close = np.array(rsp_close, dtype="float64")
+        spy_close = np.array(spy_close, dtype="float64")
+        spy_volume = np.array(spy_volume, dtype="float64")
         
-        spy_data = {r["date"]: {"close": r["close"], "volume": r["volume"]} for r in spy_rows}
-        rows_inserted = 0
-        prev_spy = None
-        prev_rsp = None
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Dates on both sides (and no bad RSP close) are scored against the
+            # previous scored date; any positive RSP close moves the RSP base
+            scored = np.array(has_spy, dtype=bool) & ~(rsp_close <= 0)
+            prev_spy, has_prev_spy = _previous_where(spy_close, scored)
+            prev_rsp, has_prev_rsp = _previous_where(rsp_close, scored | (rsp_close > 0))
+            emit = (scored & has_prev_spy & (prev_spy != 0)
+                    & has_prev_rsp & (prev_rsp != 0) & (spy_close > 0))
+            
+            spy_ret = (spy_close[emit] - prev_spy[emit]) / prev_spy[emit]
+            rsp_ret = (rsp_close[emit] - prev_rsp[emit]) / prev_rsp[emit]
+            breadth_pct = (rsp_ret - spy_ret) * 100
         
-        with get_connection(db_path) as conn:
-            for idx, row in rsp_data.iterrows():
-                date_str = idx.strftime("%Y-%m-%d") if hasattr(idx, 'strftime') else str(idx)[:10]
-                rsp_close = float(row.get("Close", 0))
-                
-                if date_str not in spy_data or rsp_close <= 0:
-                    prev_rsp = rsp_close if rsp_close > 0 else prev_rsp
-                    continue
-                
-                spy_close = spy_data[date_str]["close"]
-                spy_volume = spy_data[date_str]["volume"]
-                
-                if prev_spy and prev_rsp and spy_close > 0:
-                    spy_ret = (spy_close - prev_spy) / prev_spy
-                    rsp_ret = (rsp_close - prev_rsp) / prev_rsp
-                    breadth_diff = rsp_ret - spy_ret
-                    
-                    if breadth_diff > 0:
-                        up_vol = spy_volume * (1.0 + min(breadth_diff * 100, 2.0))
-                        down_vol = spy_volume * max(0.3, 1.0 - min(breadth_diff * 100, 0.7))
-                    else:
-                        up_vol = spy_volume * max(0.3, 1.0 + max(breadth_diff * 100, -0.7))
-                        down_vol = spy_volume * (1.0 + min(abs(breadth_diff) * 100, 2.0))
-                    
-                    if spy_ret > 0.01:
-                        up_vol *= 1.3
-                    elif spy_ret < -0.01:
-                        down_vol *= 1.3
-                    
-                    conn.execute("""
-                        INSERT OR IGNORE INTO nyse_volume (date, up_volume, down_volume)
-                        VALUES (?, ?, ?)
-                    """, (date_str, up_vol, down_vol))
-                    rows_inserted += 1
-                
-                prev_spy = spy_close
-                prev_rsp = rsp_close
+        up_vol, down_vol = _breadth_volumes(spy_ret, breadth_pct, spy_volume[emit])
+        rows = list(zip(rsp_dates[emit].tolist(), up_vol.tolist(), down_vol.tolist()))
+        
+        with get_connection(db_path, bulk=True, immediate=True) as conn:
+            conn.executemany("""
+                INSERT OR IGNORE INTO nyse_volume (date, up_volume, down_volume)
+                VALUES (?, ?, ?)
+            """, rows)
+        rows_inserted = len(rows)
         
         print(f"  RSP breadth proxy: {rows_inserted} rows")
         return rows_inserted
@@ -300,62 +575,238 @@ def _compute_rsp_breadth(db_path=None):
         return 0
 
 
-def fetch_nyse_volume(api_key=None, db_path=None):
+def _all_tickers():
+    """Every ticker fetch_all downloads, in order."""
+    return list(dict.fromkeys([*ALL_SYMBOLS, *WARNING_SYMBOLS, VIX_SYMBOL]))
+
+
+_MARKET_TZ = ZoneInfo("America/New_York")
+
+
+def _market_open(now=None):
+    """Whether US equities are trading (weekday 9:30–16:00 ET; holidays not considered)."""
+    now = now or datetime.now(_MARKET_TZ)
+    minutes = now.hour * 60 + now.minute
+    return now.weekday() < 5 and 9 * 60 + 30 <= minutes < 16 * 60
+
+
+def data_is_fresh(max_age_minutes=15, db_path=None):
     """
-    Fetch NYSE breadth data.
-    
-    1. Scrape today's real A/D ratio from Barchart ($ADRN)
-    2. Backfill historical with RSP vs SPY proxy for backtests
+    Whether a fetch_all() now would be a no-op: every ticker was fetched
+    within max_age_minutes (its last_update_<ticker> watermark in meta)
+    and the market is closed, so nothing has moved since.
     """
-    # Try Barchart for today's live ratio
-    ratio = scrape_barchart_nyse_ratio(db_path)
-    
-    # Backfill historical with RSP proxy
-    hist_rows = _compute_rsp_breadth(db_path)
-    
-    if ratio is not None:
-        print(f"  Today's NYSE A/D ratio: {ratio:.3f} (live from Barchart)")
-    
-    return hist_rows
+    if _market_open():
+        return False
+    tickers = _all_tickers()
+    stamps = get_meta([f"last_update_{ticker}" for ticker in tickers], db_path)
+    if len(stamps) < len(tickers):
+        return False
+    oldest = min(datetime.fromisoformat(stamp) for stamp in stamps.values())
+    return datetime.now() - oldest < timedelta(minutes=max_age_minutes)
 
 
 def fetch_all(start_date=None, end_date=None, db_path=None):
     """
     Fetch all data sources. Main entry point for data ingestion.
     
+    ETF prices, warning symbols (XLU, GLD for intermarket analysis) and VIX
+    come from a single yf.download; the Barchart scrape runs alongside it
+    on a worker thread.
+    
     Returns:
         dict: Summary of all fetches.
     """
     results = {}
+    start_date, end_date = _default_range(start_date, end_date)
+    tickers = _all_tickers()
+    # Only what the database is missing (from each ticker's latest stored day)
+    fetch, fetch_start = _plan_download(tickers, start_date, end_date, db_path)
+    up_to_date = set(tickers) - set(fetch)
+    
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        # Today's live NYSE A/D ratio from Barchart
+        ratio = pool.submit(scrape_barchart_nyse_ratio, db_path)
+        
+        data = None
+        if fetch:
+            print(f"Fetching price data for {len(fetch)} symbols from {fetch_start} to {end_date}...")
+            data = _download(fetch, fetch_start, end_date)
+        results["prices"] = _store_prices(data, ALL_SYMBOLS, db_path, up_to_date)
+        results["warning_symbols"] = _store_prices(data, WARNING_SYMBOLS, db_path, up_to_date)
+        if VIX_SYMBOL in up_to_date:
+            print("  VIX: up to date")
+            results["vix"] = 0
+        else:
+            results["vix"] = _store_vix(data, db_path)
+        
+        # Watermark every ticker that is now current
+        stored = {**results["prices"], **results["warning_symbols"], VIX_SYMBOL: results["vix"]}
+        now = datetime.now().isoformat(timespec="seconds")
+        set_meta({f"last_update_{ticker}": now for ticker in tickers
+                  if ticker in up_to_date or stored.get(ticker)}, db_path)
+        
+        # RSP fallback backfill reads the RSP and SPY prices stored above
+        results["nyse_volume"] = _compute_rsp_breadth(db_path)
+        if ratio.result() is not None:
+            print(f"  Today's NYSE A/D ratio: {ratio.result():.3f} (live from Barchart)")
     
-    # Fetch all ETF prices
-    price_results = fetch_yfinance_prices(
-        symbols=ALL_SYMBOLS,
-        start_date=start_date,
-        end_date=end_date,
-        db_path=db_path
-    )
-    results["prices"] = price_results
-    
-    # Fetch warning symbols (XLU, GLD for intermarket analysis)
-    from asset_revesting.config import WARNING_SYMBOLS
-    warning_results = fetch_yfinance_prices(
-        symbols=WARNING_SYMBOLS,
-        start_date=start_date,
-        end_date=end_date,
-        db_path=db_path
-    )
-    results["warning_symbols"] = warning_results
+    return results
+
+
+# Fixed read templates: open-ended ranges bind sentinel bounds instead of
+# changing the SQL text, so each query is parsed once per connection.
+# (symbol, date) / date are the primary keys, so these are index range scans.
+_DATE_MIN = "0000-00-00"
+_DATE_MAX = "9999-99-99"
+
+_SQL_PRICE_RANGE = """
+    SELECT date, open, high, low, close, volume FROM prices
+    WHERE symbol = ? AND date BETWEEN ? AND ?
+    ORDER BY date ASC
+"""
+_SQL_VIX_RANGE = """
+    SELECT date, close FROM vix
+    WHERE date BETWEEN ? AND ?
+    ORDER BY date ASC
+"""
+_SQL_NYSE_VOLUME_RANGE = """
+    SELECT date, up_volume, down_volume FROM nyse_volume
+    WHERE date BETWEEN ? AND ?
+    ORDER BY date ASC
+"""
+# Trading days come from the symbol's prices; VIX and NYSE volume are NULL
+# on days they are missing
+_SQL_ALIGNED_RANGE = """
+    SELECT p.date, p.open, p.high, p.low, p.close, p.volume,
+           v.close AS vix_close, n.up_volume, n.down_volume
+    FROM prices p
+    LEFT JOIN vix v ON v.date = p.date
+    LEFT JOIN nyse_volume n ON n.date = p.date
+    WHERE p.symbol = ? AND p.date BETWEEN ? AND ?
+    ORDER BY p.date ASC
+"""
+# Version stamp of a symbol's stored prices: the last date alone misses
+# re-fetched closes for that day, so the row count and close total ride along
+_SQL_PRICE_STAMP = """
+    SELECT MAX(date), COUNT(*), TOTAL(close) FROM prices WHERE symbol = ?
+"""
+
+
+def _read_date_range(sql, params, start_date, end_date, db_path=None):
+    """
+    Run a range template and return a DataFrame indexed by datetime.
+    
+    Built column-wise with explicit dtypes (float64 values, one fixed-format
+    date parse) instead of read_sql_query's per-column type inference.
+    """
+    params = [*params, start_date or _DATE_MIN, end_date or _DATE_MAX]
+    with get_connection(db_path) as conn:
+        cursor = conn.execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        rows = cursor.fetchall()
+    
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+    index = pd.DatetimeIndex(pd.to_datetime(list(columns[0]), format="%Y-%m-%d"), name="date")
+    return pd.DataFrame({
+        name: np.array(values, dtype="float64")
+        for name, values in zip(names[1:], columns[1:])
+    }, index=index)
+
+
+# Parquet cold copy of each symbol's price history (only with pyarrow
+# installed): one file per closed calendar year, <archive>/<symbol>/<year>.parquet.
+# A daily update only writes into the open year, which stays in SQLite, so it
+# touches no files; a partition is rewritten only when rows in its year
+# change. Reads check the archived row count against SQLite and fall back to
+# SQLite when they differ.
+_SQL_PRICE_SPAN = """
+    SELECT MIN(date), MAX(date) FROM prices WHERE symbol = ?
+"""
+_SQL_PRICE_COUNT = """
+    SELECT COUNT(*) FROM prices WHERE symbol = ? AND date BETWEEN ? AND ?
+"""
+
+
+def _price_parquet_dir(symbol, db_path=None):
+    """Directory holding a symbol's yearly Parquet partitions."""
+    return os.path.join(get_price_archive_dir(db_path), symbol)
+
+
+def _sync_price_parquet(symbol, from_year, db_path=None):
+    """
+    Bring a symbol's closed-year partitions in line with SQLite.
     
-    # Fetch VIX
-    vix_rows = fetch_vix(start_date=start_date, end_date=end_date, db_path=db_path)
-    results["vix"] = vix_rows
+    Years from from_year on (the ones just written) are rewritten, earlier
+    closed years only when their file is missing. The year of the latest
+    stored date is still open and is not archived.
+    """
+    with get_connection(db_path) as conn:
+        first_date, last_date = conn.execute(_SQL_PRICE_SPAN, [symbol]).fetchone()
+    if last_date is None:
+        return
+    directory = _price_parquet_dir(symbol, db_path)
+    for year in range(int(first_date[:4]), int(last_date[:4])):
+        path = os.path.join(directory, f"{year}.parquet")
+        if year >= from_year or not os.path.exists(path):
+            _write_price_partition(symbol, year, path, db_path)
+
+
+def _write_price_partition(symbol, year, path, db_path=None):
+    """Write one year of a symbol's SQLite prices to its Parquet partition."""
+    try:
+        df = _read_date_range(_SQL_PRICE_RANGE, [symbol], f"{year}-01-01", f"{year}-12-31", db_path)
+        df.index = df.index.strftime("%Y-%m-%d")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        df.reset_index().to_parquet(tmp, engine="pyarrow", compression="zstd", index=False)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"  Parquet write failed for {symbol} {year}: {e}")
+
+
+def _read_price_parquet(symbol, start_date, end_date, db_path=None):
+    """
+    Read the archived part of a date range from a symbol's partitions.
     
-    # Fetch NYSE breadth from Barchart (with RSP fallback)
-    nyse_rows = fetch_nyse_volume(db_path=db_path)
-    results["nyse_volume"] = nyse_rows
+    Returns:
+        tuple: (DataFrame like get_price_dataframe, last date the archive
+               covers), or None when there is no usable archive for the range
+    """
+    directory = _price_parquet_dir(symbol, db_path)
+    if pq is None or not os.path.isdir(directory):
+        return None
+    years = sorted(int(name[:4]) for name in os.listdir(directory) if name.endswith(".parquet"))
+    if not years:
+        return None
     
-    return results
+    archive_end = f"{years[-1]}-12-31"
+    low = start_date or _DATE_MIN
+    high = min(end_date or _DATE_MAX, archive_end)
+    if low > high:
+        return None
+    try:
+        frames = [
+            pd.read_parquet(os.path.join(directory, f"{year}.parquet"), engine="pyarrow",
+                            filters=[("date", ">=", low), ("date", "<=", high)])
+            for year in years
+            if f"{year}-12-31" >= low and f"{year}-01-01" <= high
+        ]
+    except Exception as e:
+        print(f"  Parquet read failed for {symbol}: {e}")
+        return None
+    df = pd.concat(frames, ignore_index=True) if frames else None
+    
+    # A rebuilt database or rows written around _store_prices leave the
+    # archive out of step — SQLite is authoritative
+    with get_connection(db_path) as conn:
+        (stored,) = conn.execute(_SQL_PRICE_COUNT, [symbol, low, high]).fetchone()
+    if df is None or len(df) != stored:
+        return None
+    
+    index = pd.DatetimeIndex(pd.to_datetime(df.pop("date"), format="%Y-%m-%d"), name="date")
+    df.index = index
+    return df.astype("float64"), archive_end
 
 
 def get_price_dataframe(symbol, start_date=None, end_date=None, db_path=None):
@@ -363,26 +814,47 @@ def get_price_dataframe(symbol, start_date=None, end_date=None, db_path=None):
     Retrieve price data from SQLite as a pandas DataFrame.
     Useful for indicator calculations.
     
+    With pyarrow installed, closed years are read from the symbol's
+    Parquet partitions and only the days after them come from SQLite.
+    
     Returns:
         pd.DataFrame with columns: open, high, low, close, volume
         Index: datetime
     """
-    with get_connection(db_path) as conn:
-        query = "SELECT date, open, high, low, close, volume FROM prices WHERE symbol = ?"
-        params = [symbol]
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY date ASC"
-        
-        df = pd.read_sql_query(query, conn, params=params, parse_dates=["date"])
-        df.set_index("date", inplace=True)
+    cold = _read_price_parquet(symbol, start_date, end_date, db_path)
+    if cold is None:
+        return _read_date_range(_SQL_PRICE_RANGE, [symbol], start_date, end_date, db_path)
+    
+    df, archive_end = cold
+    if end_date and end_date <= archive_end:
         return df
+    tail_start = (date.fromisoformat(archive_end) + timedelta(days=1)).isoformat()
+    if start_date and start_date > tail_start:
+        tail_start = start_date
+    tail = _read_date_range(_SQL_PRICE_RANGE, [symbol], tail_start, end_date, db_path)
+    return pd.concat([df, tail]) if not tail.empty else df
+
+
+@lru_cache(maxsize=32)
+def _cached_prices(symbol, start_date, end_date, db_path, stamp):
+    """get_price_dataframe() memoized per stamp; never handed out directly."""
+    return get_price_dataframe(symbol, start_date, end_date, db_path)
+
+
+def get_cached_price_dataframe(symbol, start_date=None, end_date=None, db_path=None):
+    """
+    get_price_dataframe() shared across callers in this process.
+    
+    Compute and verify passes over the same symbol reuse one load until the
+    symbol's stored prices change (checked with one aggregate query).
+    
+    Returns:
+        pd.DataFrame: a copy, safe for the caller to modify
+    """
+    db_path = get_db_path(db_path)
+    with get_connection(db_path) as conn:
+        stamp = tuple(conn.execute(_SQL_PRICE_STAMP, [symbol]).fetchone())
+    return _cached_prices(symbol, start_date, end_date, db_path, stamp).copy()
 
 
 def get_vix_dataframe(start_date=None, end_date=None, db_path=None):
@@ -393,22 +865,7 @@ def get_vix_dataframe(start_date=None, end_date=None, db_path=None):
         pd.DataFrame with column: close
         Index: datetime
     """
-    with get_connection(db_path) as conn:
-        query = "SELECT date, close FROM vix WHERE 1=1"
-        params = []
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY date ASC"
-        
-        df = pd.read_sql_query(query, conn, params=params, parse_dates=["date"])
-        df.set_index("date", inplace=True)
-        return df
+    return _read_date_range(_SQL_VIX_RANGE, [], start_date, end_date, db_path)
 
 
 def get_nyse_volume_dataframe(start_date=None, end_date=None, db_path=None):
@@ -419,22 +876,20 @@ def get_nyse_volume_dataframe(start_date=None, end_date=None, db_path=None):
         pd.DataFrame with columns: up_volume, down_volume
         Index: datetime
     """
-    with get_connection(db_path) as conn:
-        query = "SELECT date, up_volume, down_volume FROM nyse_volume WHERE 1=1"
-        params = []
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY date ASC"
-        
-        df = pd.read_sql_query(query, conn, params=params, parse_dates=["date"])
-        df.set_index("date", inplace=True)
-        return df
+    return _read_date_range(_SQL_NYSE_VOLUME_RANGE, [], start_date, end_date, db_path)
+
+
+def get_aligned_dataframe(symbol, start_date=None, end_date=None, db_path=None):
+    """
+    Retrieve a symbol's prices with VIX and NYSE volume on the same dates,
+    joined in one query instead of three reads and a pandas merge.
+    
+    Returns:
+        pd.DataFrame with columns: open, high, low, close, volume,
+        vix_close, up_volume, down_volume (NaN where missing)
+        Index: datetime (the symbol's trading days)
+    """
+    return _read_date_range(_SQL_ALIGNED_RANGE, [symbol], start_date, end_date, db_path)
 
 
 def get_data_summary(db_path=None):
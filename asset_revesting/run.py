@@ -12,33 +12,30 @@ Usage:
 
 import sys
 import os
+import logging
 
 # Add parent directory to path so we can run from anywhere
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from asset_revesting.data.database import init_db, get_connection
-from asset_revesting.data.ingestion import fetch_all, get_data_summary
+from asset_revesting.data.database import init_db, get_connection, refreshing
+from asset_revesting.data.ingestion import fetch_all, get_data_summary, data_is_fresh
 from asset_revesting.core.indicators import (
     compute_all_indicators,
     get_latest_indicators,
+    get_latest_indicators_multi,
     get_latest_vix,
     get_indicator_history,
 )
 from asset_revesting.config import ANALYSIS_SYMBOLS
 
+logger = logging.getLogger("asset_revesting.run")
 
-def cmd_init():
+
+def cmd_init(start_date=None):
     """First-time setup: create DB, fetch all historical data, compute indicators, compute stages."""
     print("=" * 60)
     print("ASSET REVESTING SIGNAL ENGINE — INITIALIZATION")
     print("=" * 60)
-
-    # Parse optional --start flag
-    start_date = None
-    args = sys.argv[2:]
-    for i, arg in enumerate(args):
-        if arg == "--start" and i + 1 < len(args):
-            start_date = args[i + 1]
     
     # Step 1: Create database
     print("\n[1/4] Initializing database...")
@@ -74,13 +71,18 @@ def cmd_update():
     init_db()  # ensure tables exist
     
     print("\n[1/3] Fetching latest data...")
-    from datetime import datetime, timedelta
-    # Fetch last 10 days to catch any gaps
-    start = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
-    results = fetch_all(start_date=start)
+    # Only the download is skipped when fresh: the steps below still run, so
+    # a compute that failed after the last fetch is retried
+    if data_is_fresh():
+        print("  Data was fetched in the last 15 minutes and the market is closed — skipping download.")
+    else:
+        from datetime import datetime, timedelta
+        # Fetch last 10 days to catch any gaps
+        start = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
+        results = fetch_all(start_date=start)
     
     print("\n[2/3] Recomputing indicators...")
-    indicator_results = compute_all_indicators()
+    indicator_results = compute_all_indicators(incremental=True)
 
     print("\n[3/3] Updating stage analysis...")
     from asset_revesting.core.stage_analysis import compute_stage_history
@@ -95,8 +97,8 @@ def cmd_status():
     get_data_summary()
     
     print("LATEST INDICATORS:")
-    for symbol in ANALYSIS_SYMBOLS:
-        ind = get_latest_indicators(symbol)
+    latest = get_latest_indicators_multi(ANALYSIS_SYMBOLS)
+    for symbol, ind in latest.items():
         if ind:
             print(f"\n  {symbol} (as of {ind['date']}):")
             print(f"    Close:    ${ind.get('sma_5', 0):>10.2f} (5-SMA)")
@@ -130,32 +132,27 @@ def cmd_signal():
     print_daily_report()
 
 
-def cmd_backtest():
+def cmd_backtest(start=None, end=None, verbose=False):
     """Run the backtester over available data."""
     init_db()
     from asset_revesting.core.backtester import run_full_backtest
 
-    # Check for optional args: python -m asset_revesting.run backtest [start] [end] [--verbose]
-    start = None
-    end = None
-    verbose = False
-
-    args = sys.argv[2:]
-    for arg in args:
-        if arg == "--verbose" or arg == "-v":
-            verbose = True
-        elif start is None:
-            start = arg
-        elif end is None:
-            end = arg
-
     run_full_backtest(start_date=start, end_date=end, verbose=verbose)
 
 
-def cmd_report():
-    """Generate and send the daily email report."""
+def cmd_report(log=False):
+    """
+    Generate and send the daily email report.
+
+    Args:
+        log: write output to the rotating report.log instead of stdout
+             (set by the scheduler's LaunchAgent)
+    """
     init_db()
     from asset_revesting.core.email_report import run_daily_report
+    if log:
+        from asset_revesting.core.scheduler import configure_report_logging
+        configure_report_logging()
     run_daily_report()
 
 
@@ -264,22 +261,27 @@ def cmd_schedule_status():
         print("  Install with: python -m asset_revesting.run schedule-install")
 
 
-def cmd_dashboard():
-    """Launch the web dashboard."""
-    init_db()
-
-    # Auto-update data on startup
-    print("Updating data before launching dashboard...")
+def _refresh_dashboard_data():
+    """Dashboard startup update: fetch the last 10 days and recompute."""
     from datetime import datetime, timedelta
+    from asset_revesting.core.stage_analysis import compute_stage_history
     start = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
     try:
-        results = fetch_all(start_date=start)
-        compute_all_indicators()
-        from asset_revesting.core.stage_analysis import compute_stage_history
-        compute_stage_history()
+        # Requests served meanwhile read the last committed data read-only
+        with refreshing():
+            # Fresh data skips only the download; recomputing is incremental
+            if not data_is_fresh():
+                fetch_all(start_date=start)
+            compute_all_indicators(incremental=True)
+            compute_stage_history()
         print("Data updated.\n")
-    except Exception as e:
-        print(f"Warning: data update failed ({e}). Using cached data.\n")
+    except Exception:
+        logger.exception("Dashboard data update failed; serving cached data")
+
+
+def cmd_dashboard():
+    """Launch the web dashboard."""
+    init_db()
 
     try:
         import uvicorn
@@ -288,6 +290,13 @@ def cmd_dashboard():
         print("Install with: pip install fastapi uvicorn")
         sys.exit(1)
 
+    # Auto-update data in the background — the server serves the cached
+    # data immediately and picks up the new rows when the update commits
+    import threading
+    print("Updating data in the background...")
+    threading.Thread(target=_refresh_dashboard_data, name="dashboard-refresh",
+                     daemon=True).start()
+
     print("Starting Asset Revesting dashboard...")
     print("Open http://localhost:8000 in your browser")
     print("Press Ctrl+C to stop\n")
@@ -299,9 +308,9 @@ def cmd_verify():
     Verify indicator calculations with spot checks.
     Fetches raw data and manually calculates a few indicators to compare.
     """
-    import pandas as pd
-    from asset_revesting.data.ingestion import get_price_dataframe
-    from asset_revesting.core.indicators import calc_sma, calc_bollinger_bands
+    import numpy as np
+    from asset_revesting.data.ingestion import get_cached_price_dataframe
+    from asset_revesting.core.indicators import calc_sma_tail, calc_bollinger_tail
     
     print("=" * 60)
     print("INDICATOR VERIFICATION")
@@ -313,17 +322,12 @@ def cmd_verify():
     print(f"\nVerifying {symbol} indicators...\n")
     
     # Get raw prices
-    prices = get_price_dataframe(symbol)
+    prices = get_cached_price_dataframe(symbol)
     if prices.empty:
         print("No price data available. Run 'init' first.")
         return
     
-    close = prices["close"]
-    
-    # Manual SMA calculation
-    manual_sma_5 = close.rolling(5).mean()
-    manual_sma_20 = close.rolling(20).mean()
-    manual_sma_200 = close.rolling(200).mean()
+    close = prices["close"].to_numpy()
     
     # Get stored indicators
     stored = get_latest_indicators(symbol)
@@ -331,56 +335,40 @@ def cmd_verify():
         print("No stored indicators. Run 'init' first.")
         return
     
-    latest_date = stored["date"]
-    latest_close = close.iloc[-1]
-    
-    print(f"Latest date: {latest_date}")
-    print(f"Latest close: ${latest_close:.2f}")
+    print(f"Latest date: {stored['date']}")
+    print(f"Latest close: ${close[-1]:.2f}")
     print()
     
-    # Compare SMAs
+    # Manual calculations (latest value only) vs stored columns
+    bb = calc_bollinger_tail(close)
     checks = [
-        ("SMA-5", manual_sma_5.iloc[-1], stored.get("sma_5")),
-        ("SMA-20", manual_sma_20.iloc[-1], stored.get("sma_20")),
-        ("SMA-200", manual_sma_200.iloc[-1], stored.get("sma_200")),
+        ("SMA-5", calc_sma_tail(close, 5)[-1], "sma_5"),
+        ("SMA-20", calc_sma_tail(close, 20)[-1], "sma_20"),
+        ("SMA-200", calc_sma_tail(close, 200)[-1], "sma_200"),
+        ("BB-Upper", bb["upper"][-1], "bb_upper"),
+        ("BB-Lower", bb["lower"][-1], "bb_lower"),
+        ("BB-%B", bb["percent_b"][-1], "bb_percent_b"),
     ]
+    names, manual, columns = zip(*checks)
+    manual = np.array(manual)
+    stored_vals = np.array([np.nan if stored.get(col) is None else stored[col] for col in columns])
     
-    all_pass = True
-    for name, manual, stored_val in checks:
-        if stored_val is None:
-            print(f"  {name}: SKIP (no stored value)")
-            continue
-        
-        diff = abs(manual - stored_val)
-        ok = diff < 0.01  # tolerance
-        status = "✓ PASS" if ok else "✗ FAIL"
-        print(f"  {name}: Manual={manual:.4f}  Stored={stored_val:.4f}  Diff={diff:.6f}  {status}")
-        if not ok:
-            all_pass = False
+    # All comparisons at once; a NaN manual value fails like any mismatch
+    skipped = np.isnan(stored_vals)
+    diff = np.abs(manual - stored_vals)
+    ok = diff < 0.01  # tolerance
     
-    # Verify Bollinger Bands
-    bb = calc_bollinger_bands(close)
-    bb_checks = [
-        ("BB-Upper", bb["upper"].iloc[-1], stored.get("bb_upper")),
-        ("BB-Lower", bb["lower"].iloc[-1], stored.get("bb_lower")),
-        ("BB-%B", bb["percent_b"].iloc[-1], stored.get("bb_percent_b")),
-    ]
-    
-    print()
-    for name, manual, stored_val in bb_checks:
-        if stored_val is None:
+    for i, name in enumerate(names):
+        if i and name[:3] != names[i - 1][:3]:
+            print()  # SMA checks, then Bollinger checks
+        if skipped[i]:
             print(f"  {name}: SKIP (no stored value)")
             continue
-        
-        diff = abs(manual - stored_val)
-        ok = diff < 0.01
-        status = "✓ PASS" if ok else "✗ FAIL"
-        print(f"  {name}: Manual={manual:.4f}  Stored={stored_val:.4f}  Diff={diff:.6f}  {status}")
-        if not ok:
-            all_pass = False
+        status = "✓ PASS" if ok[i] else "✗ FAIL"
+        print(f"  {name}: Manual={manual[i]:.4f}  Stored={stored_vals[i]:.4f}  Diff={diff[i]:.6f}  {status}")
     
     print()
-    if all_pass:
+    if (ok | skipped).all():
         print("ALL CHECKS PASSED ✓")
     else:
         print("SOME CHECKS FAILED ✗ — investigate discrepancies")
@@ -395,46 +383,57 @@ def _fmt(val, pct=False):
     return f"{val:.2f}"
 
 
+COMMANDS = {
+    "init": cmd_init,
+    "update": cmd_update,
+    "status": cmd_status,
+    "verify": cmd_verify,
+    "stages": cmd_stages,
+    "signal": cmd_signal,
+    "backtest": cmd_backtest,
+    "dashboard": cmd_dashboard,
+    "report": cmd_report,
+    "test-email": cmd_test_email,
+    "configure-email": cmd_configure_email,
+    "schedule-install": cmd_schedule_install,
+    "schedule-remove": cmd_schedule_remove,
+    "schedule-status": cmd_schedule_status,
+}
+
+
+def _build_parser():
+    """One subcommand per COMMANDS entry; options become handler keyword args."""
+    import argparse
+    import inspect
+
+    parser = argparse.ArgumentParser(prog="python -m asset_revesting.run")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    sub = {
+        name: subparsers.add_parser(name, help=(inspect.getdoc(handler) or "").partition("\n")[0])
+        for name, handler in COMMANDS.items()
+    }
+
+    sub["init"].add_argument("--start", dest="start_date", metavar="YYYY-MM-DD",
+                             help="fetch history from this date")
+    sub["backtest"].add_argument("start", nargs="?", help="first date (YYYY-MM-DD)")
+    sub["backtest"].add_argument("end", nargs="?", help="last date (YYYY-MM-DD)")
+    sub["backtest"].add_argument("-v", "--verbose", action="store_true")
+    sub["report"].add_argument("--log", action="store_true",
+                               help="write output to the rotating report.log")
+    return parser
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python -m asset_revesting.run [init|update|status|verify]")
-        sys.exit(1)
-    
-    command = sys.argv[1].lower()
-    
-    if command == "init":
-        cmd_init()
-    elif command == "update":
-        cmd_update()
-    elif command == "status":
-        cmd_status()
-    elif command == "verify":
-        cmd_verify()
-    elif command == "stages":
-        cmd_stages()
-    elif command == "signal":
-        cmd_signal()
-    elif command == "backtest":
-        cmd_backtest()
-    elif command == "report":
-        cmd_report()
-    elif command == "test-email":
-        cmd_test_email()
-    elif command == "configure-email":
-        cmd_configure_email()
-    elif command == "schedule-install":
-        cmd_schedule_install()
-    elif command == "schedule-remove":
-        cmd_schedule_remove()
-    elif command == "schedule-status":
-        cmd_schedule_status()
-    elif command == "dashboard":
-        cmd_dashboard()
-    else:
-        print(f"Unknown command: {command}")
-        print("Available: init, update, status, verify, stages, signal, backtest, dashboard, report, test-email, configure-email, schedule-install, schedule-remove, schedule-status")
+    parser = _build_parser()
+    argv = sys.argv[1:]
+    if not argv:
+        parser.print_help()
         sys.exit(1)
 
+    # Command names are case-insensitive
+    args = vars(parser.parse_args([argv[0].lower(), *argv[1:]]))
+    COMMANDS[args.pop("command")](**args)
+
 
 if __name__ == "__main__":
     main()